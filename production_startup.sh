@@ -3,4 +3,4 @@ cd src
 mkdir /home/site/wwwroot/src/config/static
 python manage.py collectstatic --noinput
 python manage.py migrate
-gunicorn --bind=0.0.0.0 --timeout 600 config.wsgi:application
+gunicorn --bind=0.0.0.0 --timeout 600 --worker-class gthread --threads "${GUNICORN_THREADS:-8}" config.wsgi:application
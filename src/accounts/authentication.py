@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .tokens import USER_CLAIMS
+from core import versions
+
+FIELD_NAMES = tuple(field.attname for field in User._meta.concrete_fields)
+
+
+def get_version_key(jwt_secret):
+    return f'accounts:jwt-secret:{jwt_secret}:auth'
+
+
+def invalidate(*jwt_secrets):
+    """ Make tokens issued for the secrets, cached by any process, authenticate against the database again. """
+
+    versions.bump_versions(*(get_version_key(jwt_secret) for jwt_secret in jwt_secrets))
+
+
+def get_generation_key(user_id):
+    return f'accounts:user:{user_id}:token-generation'
+
+
+def get_token_generation(user_id):
+    """ Current token generation of the user, None if the user doesn't exist. The value read from the database
+    is cached under the version of the generation, which is kept in the database, so a bump by any process
+    makes every process read it again. The version is read first, a change committed in between bumps it. """
+
+    version = versions.get_version(get_generation_key(user_id)).value
+    key = f'{get_generation_key(user_id)}:{version}'
+    generation = cache.get(key)
+    if generation is None:
+        generation = User.all.filter(pk=user_id).values_list('token_generation', flat=True).first()
+        if generation is not None:
+            cache.set(key, generation, timeout=settings.AUTH_USER_CACHE_TTL)
+    return generation
+
+
+def invalidate_token_generation(user_id):
+    versions.bump_versions(get_generation_key(user_id))
+
+
+def get_token_version(validated_token):
+    """ Auth version of the token's `jwt_secret`, it only grows. It's kept in the database,
+    so every process sees a bump. """
+    return versions.get_version(get_version_key(validated_token[api_settings.USER_ID_CLAIM])).value
+
+
+class AuthenticatedUserCache:
+    """ Bounded per-worker LRU of verified access tokens mapped to the rows of their users.
+    Entries live for `timeout` seconds at most and never outlive the token. Each entry keeps the auth version
+    of the token's `jwt_secret`, which is read again on every hit with one primary key query,
+    so a version bumped by any process makes it stale in every worker. """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, raw_token):
+        """ Return a fresh user instance and the validated token, or None if the token isn't cached. """
+
+        with self.lock:
+            entry = self.entries.get(raw_token)
+            if entry is None:
+                return None
+            self.entries.move_to_end(raw_token)
+
+        values, validated_token, version, expires_at = entry
+        if expires_at <= time.time() or get_token_version(validated_token) != version:
+            with self.lock:
+                self.entries.pop(raw_token, None)
+            return None
+        return User.from_db(DEFAULT_DB_ALIAS, FIELD_NAMES, values), validated_token
+
+    def set(self, raw_token, user, validated_token, version):
+        values = tuple(getattr(user, name) for name in FIELD_NAMES)
+        expires_at = min(time.time() + self.timeout, validated_token['exp'])
+        with self.lock:
+            self.entries[raw_token] = (values, validated_token, version, expires_at)
+            self.entries.move_to_end(raw_token)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = AuthenticatedUserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """ JWT authentication that skips token verification and the user query for tokens
+    already authenticated by the worker, see `AuthenticatedUserCache`. """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cached = user_cache.get(raw_token)
+        if cached is not None:
+            return cached
+
+        validated_token = self.get_validated_token(raw_token)
+        # the version is read before the user, so a change committed in between makes the entry stale
+        version = get_token_version(validated_token) if api_settings.USER_ID_CLAIM in validated_token else None
+        user = self.get_user(validated_token)
+        user_cache.set(raw_token, user, validated_token, version)
+        return user, validated_token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """ JWT authentication trusting the user claims signed into access tokens, see `accounts.tokens`.
+    The user is built from the claims with all other fields deferred and loads its row when one of them
+    is accessed. Tokens of a previous generation are rejected, tokens without the claims are
+    authenticated by `JWTAuthentication`. """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if not all(claim in validated_token for claim in USER_CLAIMS):
+            return super().authenticate(request)
+
+        return self.get_claims_user(validated_token), validated_token
+
+    def get_claims_user(self, validated_token):
+        # the same users as `User.objects` may authenticate
+        if not validated_token['is_active'] or validated_token['is_staff'] or validated_token['is_superuser']:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if get_token_generation(validated_token['uid']) != validated_token['generation']:
+            raise AuthenticationFailed(_('Token is outdated, log in again'), code='token_outdated')
+
+        claims = {
+            'id': validated_token['uid'],
+            'is_active': validated_token['is_active'],
+            'is_staff': validated_token['is_staff'],
+            'is_superuser': validated_token['is_superuser'],
+            'token_generation': validated_token['generation'],
+        }
+        field_names = [name for name in FIELD_NAMES if name in claims]
+        user = User.from_db(DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names])
+        user.from_claims = True
+        return user
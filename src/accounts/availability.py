@@ -0,0 +1,214 @@
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import EmailLog, User
+
+logger = logging.getLogger(__name__)
+
+# log entries a bit below the last one at build time are read again, they may have been committed later
+CATCH_UP_OVERLAP = 1000
+# seconds an insert that took a log id may take to commit, ids missing for longer were rolled back
+GAP_TIMEOUT = 60
+# more ids skipped at once aren't concurrent inserts but e.g. sequence jumps, they aren't waited for
+MAX_GAP = 1000
+# share of appended emails that also delete log entries older than `EMAIL_LOG_RETENTION`
+PURGE_PROBABILITY = 0.001
+# seconds between catch ups from the log, emails given by other processes meanwhile aren't known yet
+CATCH_UP_INTERVAL = 1
+MIN_CAPACITY = 1000
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def log_email(email):
+    """ Append an email given to a user in the current transaction, for the filters of other processes.
+    The filter of this process gets it once the transaction commits. """
+
+    EmailLog.objects.create(email=email)
+    transaction.on_commit(lambda: email_filter.add(email))
+    if random.random() < PURGE_PROBABILITY:
+        purge_before = timezone.now() - timedelta(seconds=settings.EMAIL_LOG_RETENTION)
+        EmailLog.objects.filter(created_at__lt=purge_before).delete()
+
+
+class BloomFilter:
+    """ Set membership with no false negatives and a false positive rate of about `error_rate`
+    until `capacity` values are added. Positions are derived from one blake2b digest by double hashing. """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def get_positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self.get_positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.get_positions(value))
+
+    @property
+    def false_positive_rate(self):
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class EmailFilter:
+    """ Per-process Bloom filter of normalized emails of all users. It is built with a streaming scan
+    in a background thread, at startup or on first use, and the database answers until it's ready.
+    Emails given by this process are added on commit, emails given by others are caught up from the `EmailLog`
+    at most once per interval, so most checks don't query the database. An email given by another process
+    within the interval may be reported as available, registration still fails on the unique email then.
+    The filter is rebuilt in the background when it's filled over its capacity, which also forgets changed
+    emails, or when it wasn't caught up for half of `EMAIL_LOG_RETENTION`, the log may be purged since. """
+
+    def __init__(self, check_interval=CATCH_UP_INTERVAL):
+        self.check_interval = check_interval
+        self.bloom = None
+        self.last_id = 0
+        # log ids skipped by catching up, by the time they were noticed, they may still be committed
+        self.gaps = {}
+        self.caught_up_at = None
+        self.lock = threading.Lock()
+        self.rebuilding = False
+        self.possible_hits = 0
+        self.false_positives = 0
+
+    def build(self):
+        started_at = time.perf_counter()
+        caught_up_at = time.monotonic()
+        # read before the scan, emails logged during it are caught up
+        last_id = EmailLog.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        capacity = max(2 * User.all.count(), MIN_CAPACITY)
+        bloom = BloomFilter(capacity, settings.EMAIL_FILTER_ERROR_RATE)
+        for email in User.all.order_by().values_list('email', flat=True).iterator(chunk_size=5000):
+            bloom.add(normalize_email(email))
+
+        with self.lock:
+            self.bloom, self.last_id, self.gaps = bloom, max(0, last_id - CATCH_UP_OVERLAP), {}
+            # the overlap is read by the first check
+            self.caught_up_at = caught_up_at - self.check_interval
+            self.possible_hits = self.false_positives = 0
+        logger.info(
+            'Email filter of %d emails built in %.3fs, expected false positive rate %.6f.',
+            bloom.count, time.perf_counter() - started_at, bloom.false_positive_rate,
+        )
+
+    def rebuild_in_background(self):
+        def rebuild():
+            try:
+                self.build()
+            finally:
+                self.rebuilding = False
+                # the thread opened its own connection
+                connection.close()
+
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(target=rebuild, name='email-filter', daemon=True).start()
+
+    def is_ready(self):
+        """ Whether the filter can answer checks. Otherwise it's built in the background. """
+
+        if self.bloom is None or time.monotonic() - self.caught_up_at > settings.EMAIL_LOG_RETENTION / 2:
+            self.rebuild_in_background()
+            return False
+        if self.bloom.count > self.bloom.capacity:
+            self.rebuild_in_background()
+        return True
+
+    def catch_up(self):
+        """ Add emails logged since the last catch up, and ones logged before it but committed since. """
+
+        with self.lock:
+            now = time.monotonic()
+            if now - self.caught_up_at < self.check_interval:
+                return  # by another thread meanwhile
+
+            condition = Q(id__gt=self.last_id)
+            if self.gaps:
+                condition |= Q(id__in=list(self.gaps))
+            for entry_id, email in EmailLog.objects.filter(condition).order_by('id').values_list('id', 'email'):
+                self.bloom.add(normalize_email(email))
+                self.gaps.pop(entry_id, None)
+                if entry_id > self.last_id:
+                    if entry_id - self.last_id <= MAX_GAP:
+                        self.gaps.update(dict.fromkeys(range(self.last_id + 1, entry_id), now))
+                    self.last_id = entry_id
+            self.gaps = {entry_id: noticed_at for entry_id, noticed_at in self.gaps.items()
+                         if now - noticed_at < GAP_TIMEOUT}
+            self.caught_up_at = now
+
+    def add(self, email):
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(normalize_email(email))
+
+    def might_contain(self, email):
+        """ Return False if no user has the email, True if one may have it. The filter must be ready. """
+
+        if time.monotonic() - self.caught_up_at >= self.check_interval:
+            self.catch_up()
+        return normalize_email(email) in self.bloom
+
+    def record(self, taken):
+        """ Count the outcome of a possible hit checked in the database. """
+
+        with self.lock:
+            self.possible_hits += 1
+            if not taken:
+                self.false_positives += 1
+            observed = self.false_positives / self.possible_hits if self.possible_hits % 1000 == 0 else None
+        if observed is not None:
+            logger.info(
+                'Email filter false positive rate %.6f observed, %.6f expected.',
+                observed, self.bloom.false_positive_rate,
+            )
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+            self.last_id = 0
+            self.gaps = {}
+            self.caught_up_at = None
+
+
+email_filter = EmailFilter()
+
+
+def is_email_taken(email, exclude_user_id=None):
+    """ Whether a user has the email. Once the filter is ready, only emails it may contain
+    are looked up in the database. """
+
+    ready = email_filter.is_ready()
+    if ready and not email_filter.might_contain(email):
+        return False
+
+    queryset = User.all.filter(email=email)
+    if exclude_user_id is not None:
+        queryset = queryset.exclude(id=exclude_user_id)
+    taken = queryset.exists()
+    if ready:
+        email_filter.record(taken)
+    return taken
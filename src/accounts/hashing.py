@@ -0,0 +1,51 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+logger = logging.getLogger(__name__)
+
+# hashlib and argon2 release the GIL, hashes run in parallel with requests served by other threads
+# of the gthread worker, see production_startup.sh
+executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix='password-hashing')
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """ Argon2 with the parameters recommended by OWASP. Django's defaults use 512 KiB of memory, which makes
+    offline guesses cheap. The algorithm name is Django's, hashes made with other parameters still verify
+    and are rehashed on login. """
+
+    time_cost = 2
+    memory_cost = 19 * 1024  # KiB
+    parallelism = 1
+
+
+def run(func, *args):
+    """ Run func in the hashing pool and wait for the result. At most `PASSWORD_HASHING_WORKERS` hashes
+    are computed at once per worker, the others wait in the queue. Only the calling thread waits,
+    a burst of logins leaves the other request threads of the worker free. """
+
+    queued_at = time.perf_counter()
+
+    def timed():
+        logger.info('Password hashing waited %.6fs in queue.', time.perf_counter() - queued_at)
+        return func(*args)
+
+    return executor.submit(timed).result()
+
+
+def make_password(password):
+    return run(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """ Same as Django's `check_password`. The setter, which hashes the password again with the preferred
+    hasher, is called after the check, outside the pool. """
+
+    must_update = []
+    is_correct = run(hashers.check_password, password, encoded, must_update.append)
+    if setter and must_update:
+        setter(password)
+    return is_correct
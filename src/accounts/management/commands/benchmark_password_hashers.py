@@ -0,0 +1,49 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, get_hashers
+from django.core.management.base import BaseCommand
+
+from accounts import hashing
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure logins per second of every configured password hasher: verified one after another on one core, '
+        'and concurrently through the hashing pool of a worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help='Number of passwords verified per measurement.')
+        parser.add_argument('--threads', type=int, default=settings.PASSWORD_HASHING_WORKERS,
+                            help='Number of concurrent logins, the pool runs at most PASSWORD_HASHING_WORKERS.')
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        cores = min(options['threads'], settings.PASSWORD_HASHING_WORKERS, os.cpu_count() or 1)
+        self.stdout.write(
+            f'{logins} logins, {options["threads"]} concurrent, pool of {settings.PASSWORD_HASHING_WORKERS}:'
+        )
+
+        for hasher in get_hashers():
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+
+            started_at = time.perf_counter()
+            for __ in range(logins):
+                hasher.verify(PASSWORD, encoded)
+            sequential = logins / (time.perf_counter() - started_at)
+
+            started_at = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as clients:
+                list(clients.map(lambda __: hashing.check_password(PASSWORD, encoded), range(logins)))
+            pooled = logins / (time.perf_counter() - started_at)
+
+            preferred = ' (preferred)' if hasher.algorithm == get_hasher().algorithm else ''
+            self.stdout.write(
+                f'  {hasher.algorithm:<16} {sequential:8.1f} logins/s per core'
+                f' {pooled:8.1f} logins/s pooled, {pooled / cores:8.1f} per core{preferred}'
+            )
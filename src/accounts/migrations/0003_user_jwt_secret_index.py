@@ -0,0 +1,19 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:44
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='jwt_secret',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4),
+        ),
+    ]
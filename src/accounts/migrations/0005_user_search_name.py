@@ -0,0 +1,54 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+from core.utils import normalize_search_text
+
+
+def fill_search_names(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = []
+    for user in User.all.only('id', 'name').iterator(chunk_size=2000):
+        user.search_name = normalize_search_text(user.name)[:255]
+        users.append(user)
+        if len(users) == 2000:
+            User.all.bulk_update(users, ['search_name'])
+            users = []
+    User.all.bulk_update(users, ['search_name'])
+
+
+def create_trigram_index(apps, schema_editor):
+    """ Names are also matched by word prefixes, which a trigram index serves on PostgreSQL only. """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX accounts_user_search_name_trgm ON accounts_user USING gin (search_name gin_trgm_ops) '
+        'WHERE is_active AND NOT is_staff AND NOT is_superuser'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS accounts_user_search_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_token_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_staff', False), ('is_superuser', False)), fields=['search_name'], name='accounts_user_search_name', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
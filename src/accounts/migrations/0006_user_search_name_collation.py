@@ -0,0 +1,35 @@
+# Generated by Django 2.2.10 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+def set_collation(collation):
+    """ With the "C" collation names are ordered bytewise, so a plain btree index serves prefix matches
+    and the order of results at once. SQLite compares text bytewise already. """
+
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(
+                f'ALTER TABLE accounts_user ALTER COLUMN search_name TYPE varchar(255) COLLATE "{collation}"'
+            )
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_search_name'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='accounts_user_search_name',
+        ),
+        migrations.RunPython(set_collation('C'), set_collation('default')),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_staff', False), ('is_superuser', False)), fields=['search_name'], name='accounts_user_search_name'),
+        ),
+    ]
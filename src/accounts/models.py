@@ -2,10 +2,14 @@ import uuid
 
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
+from . import hashing
 from .managers import UserManager, UserManagerActive
 from core.mixins import UpdateMixin
 from core.models import CreatedUpdatedModel
+from core.utils import normalize_search_text
 
 
 class BaseUser(AbstractBaseUser):
@@ -22,6 +26,21 @@ class BaseUser(AbstractBaseUser):
         help_text='Designates whether the user has verified its email address.')
     email = models.EmailField(blank=False, unique=True)
 
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """ Check the password in the hashing pool, hashes of other hashers are upgraded to the preferred one. """
+
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # password hash upgrades shouldn't be considered password changes
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return hashing.check_password(raw_password, self.password, setter)
+
     class Meta:
         abstract = True
 
@@ -31,6 +50,88 @@ class User(BaseUser, PermissionsMixin, CreatedUpdatedModel, UpdateMixin):
     objects = UserManagerActive()
 
     # The field is used by REST framework to create jwt token.
-    jwt_secret = models.UUIDField(default=uuid.uuid4)
+    jwt_secret = models.UUIDField(default=uuid.uuid4, db_index=True)
 
     name = models.CharField(max_length=128)
+    # Normalized name, users are searched by its prefixes, see `accounts.search`.
+    # On PostgreSQL the column has the "C" collation, see migration 0006, so that one btree index
+    # serves both prefix matches and the order of results. Altering the field must keep it.
+    search_name = models.CharField(max_length=255, editable=False, default='')
+
+    # Bumped whenever a field carried by access token claims changes, which revokes tokens issued before.
+    token_generation = models.PositiveIntegerField(default=0)
+
+    AUTH_FIELDS = ('jwt_secret', 'is_active', 'is_staff', 'is_superuser')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_auth_fields = {name: instance.__dict__.get(name) for name in cls.AUTH_FIELDS}
+        instance.loaded_email = instance.__dict__.get('email')
+        return instance
+
+    @property
+    def auth_fields_changed(self):
+        loaded = getattr(self, 'loaded_auth_fields', {})
+        return any(
+            name in self.__dict__ and self.__dict__[name] != loaded.get(name)
+            for name in self.AUTH_FIELDS
+        )
+
+    @property
+    def email_changed(self):
+        return 'email' in self.__dict__ and self.email != getattr(self, 'loaded_email', None)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'name' in update_fields:
+            self.search_name = normalize_search_text(self.name)[:255]
+            if update_fields is not None:
+                update_fields = {*update_fields, 'search_name'}
+
+        generation_changed = not self._state.adding and self.auth_fields_changed
+        if generation_changed:
+            self.token_generation = F('token_generation') + 1
+            if update_fields is not None:
+                update_fields = {*update_fields, 'token_generation'}
+
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+        self.loaded_auth_fields = {name: self.__dict__.get(name) for name in self.AUTH_FIELDS}
+        self.loaded_email = self.__dict__.get('email')
+        if generation_changed:
+            self.refresh_from_db(fields=['token_generation'])
+
+    def refresh_from_db(self, using=None, fields=None):
+        """ Users authenticated from token claims load all their deferred fields with the first one accessed. """
+
+        deferred = self.get_deferred_fields()
+        if fields is not None and getattr(self, 'from_claims', False):
+            fields = deferred | set(fields)
+        super().refresh_from_db(using, fields)
+
+        # values loaded now are the ones stored, changes made before loading are kept
+        loaded = self.__dict__.setdefault('loaded_auth_fields', {})
+        for name in deferred & set(self.AUTH_FIELDS):
+            loaded[name] = self.__dict__.get(name)
+        if 'email' in deferred:
+            self.loaded_email = self.__dict__.get('email')
+
+    class Meta:
+        indexes = [
+            # prefix searches of active users ordered by name, see `accounts.search`
+            models.Index(
+                fields=['search_name'], name='accounts_user_search_name',
+                condition=models.Q(is_active=True, is_staff=False, is_superuser=False),
+            ),
+        ]
+
+
+class EmailLog(models.Model):
+    """ Emails given to users, appended when a user is created or saved with an email.
+    Email filters of all processes catch up from it, see `accounts.availability`. """
+
+    email = models.EmailField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
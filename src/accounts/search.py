@@ -0,0 +1,57 @@
+from django.db.models import Case, IntegerField, Q, Value, When
+from rest_framework import filters
+
+from .models import User
+from core.utils import normalize_search_text
+
+# shorter terms have no trigram to look up, they are only matched as prefixes of the whole name
+MIN_WORD_PREFIX_LENGTH = 3
+
+
+def get_conditions(term):
+    """ Return the conditions of names starting with the term and of names with a later word starting with it. """
+
+    prefix = Q(search_name__startswith=term)
+    if len(term) < MIN_WORD_PREFIX_LENGTH:
+        return prefix, None
+    return prefix, Q(search_name__contains=f' {term}')
+
+
+def filter_users(queryset, term):
+    """ Filter users by the search term, names starting with it rank first. """
+
+    term = normalize_search_text(term)
+    if not term:
+        return queryset
+
+    prefix, word_prefix = get_conditions(term)
+    if word_prefix is None:
+        return queryset.filter(prefix).order_by('search_name', 'id')
+
+    rank = Case(When(prefix, then=Value(0)), default=Value(1), output_field=IntegerField())
+    return queryset.filter(prefix | word_prefix).annotate(rank=rank).order_by('rank', 'search_name', 'id')
+
+
+def autocomplete(term, limit):
+    """ Top `limit` active users for the search term, ranked like `filter_users`, without counting them.
+    Each rank is a separate query on the partial indexes of `search_name`. The column is ordered bytewise,
+    so the prefix index yields matches in the order of results and the scan stops after `limit` rows.
+    Word prefixes are looked up in the trigram index. """
+
+    term = normalize_search_text(term)
+    if not term:
+        return []
+
+    prefix, word_prefix = get_conditions(term)
+    queryset = User.objects.only('id', 'name').order_by('search_name', 'id')
+    users = list(queryset.filter(prefix)[:limit])
+    if word_prefix is not None and len(users) < limit:
+        users += queryset.filter(word_prefix).exclude(prefix)[:limit - len(users)]
+    return users
+
+
+class UserSearchFilter(filters.SearchFilter):
+    """ `search` query parameter matched by `filter_users` instead of a substring of every search field. """
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_users(queryset, request.query_params.get(self.search_param, ''))
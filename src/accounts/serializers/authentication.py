@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from ..tokens import AccessToken, RefreshToken
 
 
 class TokenObtainSerializer(serializers.Serializer):
@@ -11,3 +13,9 @@ class TokenObtainSerializer(serializers.Serializer):
 
     def get_refresh(self, obj):
         return str(RefreshToken.for_user(obj))
+
+
+class LoginSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return RefreshToken.for_user(user)
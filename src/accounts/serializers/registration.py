@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from ..availability import is_email_taken
 from ..models import User
 
 
@@ -18,5 +19,8 @@ class CheckFieldTakenSerializer(serializers.Serializer):
     value = serializers.CharField(write_only=True)
 
     def validate(self, attrs):
-        taken = User.all.filter(**{attrs['field']: attrs['value']}).exists()
+        if attrs['field'] == 'email':
+            taken = is_email_taken(attrs['value'])
+        else:
+            taken = User.all.filter(**{attrs['field']: attrs['value']}).exists()
         return {'taken': taken}
@@ -1,4 +1,7 @@
 from django.contrib.auth import password_validation
+from django.db import IntegrityError
+from django.db.transaction import atomic
+from django.utils.translation import ugettext as _
 from rest_framework import serializers
 
 from ..models import User
@@ -14,6 +17,11 @@ class UseSerializer(serializers.ModelSerializer):
         )
 
 
+class UserAutocompleteSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=128)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
 class MeSerializer(serializers.Serializer):
     id = serializers.ReadOnlyField()
     is_staff = serializers.ReadOnlyField()
@@ -30,19 +38,31 @@ class MeSerializer(serializers.Serializer):
     def update(self, instance, validated_data):
         validated_data.pop('email', None)  # email can't be changed by default
         validated_data.pop('password', None)
-        instance.update(**validated_data)
+        try:
+            with atomic():
+                instance.update(**validated_data)
+        except IntegrityError:
+            # an email allowed to change may be taken after validation, see `create`
+            raise serializers.ValidationError({'email': _('Email is already taken.')})
         return instance
 
     def create(self, validated_data):
         email = validated_data.pop('email')
         password = validated_data.pop('password')
-        return User.objects.create_user(email, password, **validated_data)
+        try:
+            with atomic():
+                return User.objects.create_user(email, password, **validated_data)
+        except IntegrityError:
+            # the email was taken after validation, or by a user this worker's email filter doesn't know yet
+            raise serializers.ValidationError({'email': _('Email is already taken.')})
 
 
 class UserPKField(serializers.PrimaryKeyRelatedField):
+    serializer_class = UseSerializer
+
     def use_pk_only_optimization(self):
         return False
 
     def to_representation(self, value):
-        serializer = UseSerializer(value)
+        serializer = self.serializer_class(value)
         return serializer.data
@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import authentication, availability
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    jwt_secrets = {instance.jwt_secret, getattr(instance, 'loaded_auth_fields', {}).get('jwt_secret')} - {None}
+    user_id = instance.pk
+    transaction.on_commit(lambda: authentication.invalidate(*jwt_secrets))
+    transaction.on_commit(lambda: authentication.invalidate_token_generation(user_id))
+
+
+@receiver(post_save, sender=User)
+def log_email(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is None or 'email' in update_fields) and instance.email_changed:
+        # in the same transaction, email filters of all processes see the email once the user is committed
+        availability.log_email(instance.email)
@@ -0,0 +1,151 @@
+import pytest
+import uuid
+
+from django.contrib.auth.hashers import Argon2PasswordHasher, make_password
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import tokens
+from accounts.authentication import user_cache
+from accounts.models import User
+from core.generators import DEFAULT_USER_PASSWORD
+
+ME_URL = '/api/v1/accounts/me'
+LOGIN_URL = '/api/v1/accounts/login'
+WALLETS_URL = '/api/v1/payments/wallets'
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.clear()
+
+
+@pytest.fixture
+def token_client(create_user):
+    user = create_user()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    client.user = user
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAuthenticatedUserCache:
+    def test_cached_token(self, token_client, django_assert_num_queries):
+        token_client.get(ME_URL)
+
+        # only the auth version of the token's secret
+        with django_assert_num_queries(1):
+            response = token_client.get(ME_URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['id'] == token_client.user.id
+
+    def test_changed_jwt_secret(self, token_client):
+        token_client.get(ME_URL)
+        token_client.user.jwt_secret = uuid.uuid4()
+        token_client.user.save()
+
+        response = token_client.get(ME_URL)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user(self, token_client):
+        token_client.get(ME_URL)
+        user = User.objects.get(pk=token_client.user.pk)
+        user.update(is_active=False)
+
+        response = token_client.get(ME_URL)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_by_another_process(self, token_client, other_process):
+        token_client.get(ME_URL)
+
+        with other_process:
+            User.objects.get(pk=token_client.user.pk).update(is_active=False)
+
+        response = token_client.get(ME_URL)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.fixture
+def claims_client(create_user):
+    user = create_user()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens.AccessToken.for_user(user)}')
+    client.user = user
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStatelessAuthentication:
+    def test_login_claims(self, client, user):
+        response = client.post(LOGIN_URL, {'email': user.email, 'password': DEFAULT_USER_PASSWORD})
+
+        access = AccessToken(response.data['access'])
+        assert access['uid'] == user.id
+        assert access['generation'] == user.token_generation
+
+    def test_no_user_query(self, claims_client, django_assert_num_queries):
+        claims_client.get(WALLETS_URL)
+        user_cache.clear()
+
+        # only the versions of the token generation and of the wallet snapshot, the user is built from the claims
+        with django_assert_num_queries(2):
+            response = claims_client.get(WALLETS_URL)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_lazy_user(self, claims_client, django_assert_num_queries):
+        claims_client.get(WALLETS_URL)
+
+        # the version of the token generation, and the row once, when the serializer reads the email and the name
+        with django_assert_num_queries(2):
+            response = claims_client.get(ME_URL)
+
+        assert response.data['name'] == claims_client.user.name
+        assert response.data['email'] == claims_client.user.email
+
+    def test_outdated_generation(self, claims_client):
+        claims_client.get(ME_URL)
+        claims_client.user.update(jwt_secret=uuid.uuid4())
+
+        response = claims_client.get(ME_URL)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_by_another_process(self, claims_client, other_process):
+        claims_client.get(ME_URL)
+
+        with other_process:
+            User.objects.get(pk=claims_client.user.pk).update(is_active=False)
+
+        response = claims_client.get(ME_URL)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestPasswordHashing:
+    def test_rehash_on_login(self, client, user):
+        user.update(password=make_password(DEFAULT_USER_PASSWORD, hasher='pbkdf2_sha256'))
+
+        response = client.post(LOGIN_URL, {'email': user.email, 'password': DEFAULT_USER_PASSWORD})
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.password.startswith('argon2$')
+        assert user.check_password(DEFAULT_USER_PASSWORD)
+
+    def test_weak_argon2_rehashed_on_login(self, client, user):
+        user.update(password=Argon2PasswordHasher().encode(DEFAULT_USER_PASSWORD, 'weakparameters'))
+
+        response = client.post(LOGIN_URL, {'email': user.email, 'password': DEFAULT_USER_PASSWORD})
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert '$m=19456,t=2,p=1$' in user.password
+        assert user.check_password(DEFAULT_USER_PASSWORD)
@@ -0,0 +1,116 @@
+import pytest
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.availability import BloomFilter, email_filter
+from accounts.models import EmailLog
+
+CHECK_FIELD_TAKEN_URL = '/api/v1/accounts/registration/check-field-taken'
+
+
+def check_email(email):
+    return APIClient().post(CHECK_FIELD_TAKEN_URL, {'field': 'email', 'value': email})
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(10000, 0.01)
+    for i in range(10000):
+        bloom.add(f'user{i}@example.com')
+
+    assert all(f'user{i}@example.com' in bloom for i in range(10000))
+    false_positives = sum(f'other{i}@example.com' in bloom for i in range(10000))
+    assert false_positives < 200
+    assert bloom.false_positive_rate == pytest.approx(0.01, rel=0.1)
+
+
+@pytest.fixture
+def catch_up_every_check(monkeypatch):
+    monkeypatch.setattr(email_filter, 'check_interval', 0)
+
+
+@pytest.mark.django_db
+class TestEmailAvailability:
+    def test_answered_by_database_until_built(self, user, monkeypatch):
+        rebuilds = []
+        monkeypatch.setattr(email_filter, 'rebuild_in_background', lambda: rebuilds.append(True))
+
+        response = check_email(user.email)
+
+        assert response.data == {'taken': True}
+        assert rebuilds == [True]
+        assert email_filter.possible_hits == 0
+
+    def test_not_taken_without_query(self, user, django_assert_num_queries):
+        email_filter.build()
+        check_email('nobody@example.com')
+
+        with django_assert_num_queries(0):
+            response = check_email('other@example.com')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'taken': False}
+
+    def test_caught_up_once_per_interval(self, create_user, monkeypatch):
+        monkeypatch.setattr(email_filter, 'check_interval', 60)
+        email_filter.build()
+        check_email('nobody@example.com')
+        # given by another process, the filter of this one isn't told on commit
+        user = create_user()
+
+        assert check_email(user.email).data == {'taken': False}
+        email_filter.caught_up_at -= 60
+        assert check_email(user.email).data == {'taken': True}
+
+    def test_user_created_by_another_process(self, create_user, other_process, catch_up_every_check):
+        email_filter.build()
+        check_email('nobody@example.com')
+
+        with other_process:
+            user = create_user()
+
+        assert check_email(user.email).data == {'taken': True}
+
+    def test_changed_email_taken(self, user, catch_up_every_check):
+        email_filter.build()
+        check_email('nobody@example.com')
+
+        user.update(email='changed@example.com')
+
+        assert check_email('changed@example.com').data == {'taken': True}
+
+    def test_logged_when_given(self, create_user):
+        user = create_user()
+        created_email = user.email
+
+        user.save()
+        user.update(name='Other Name')
+        user.update(email='changed@example.com')
+
+        assert list(EmailLog.objects.order_by('id').values_list('email', flat=True)) == [
+            created_email, 'changed@example.com',
+        ]
+
+    def test_committed_late(self, catch_up_every_check):
+        email_filter.build()
+        early_id = EmailLog.objects.create(email='early@example.com').id
+        EmailLog.objects.create(email='next@example.com')
+        # the early entry isn't committed yet when the filter catches up
+        EmailLog.objects.filter(id=early_id).delete()
+        email_filter.catch_up()
+
+        EmailLog.objects.create(id=early_id, email='early@example.com')
+
+        assert early_id in email_filter.gaps
+        assert email_filter.might_contain('early@example.com')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_given_by_this_process(create_user, monkeypatch):
+    monkeypatch.setattr(email_filter, 'check_interval', 60)
+    email_filter.build()
+    check_email('nobody@example.com')
+
+    user = create_user()
+
+    assert check_email(user.email).data == {'taken': True}
@@ -0,0 +1,42 @@
+import pytest
+
+from rest_framework import status
+
+
+USERS_URL = '/api/v1/accounts/users'
+AUTOCOMPLETE_URL = USERS_URL + '/autocomplete'
+
+
+@pytest.fixture
+def search_client(create_user, create_client):
+    for name in ('Joan Annal', 'Annabel Lee', 'Anna Smith', 'Émile Zola'):
+        create_user(name=name)
+    create_user(name='Anna Inactive', is_active=False)
+    return create_client(create_user(name='Me'))
+
+
+@pytest.mark.django_db
+class TestUserSearch:
+    @pytest.mark.parametrize('term, names', [
+        ('ann', ['Anna Smith', 'Annabel Lee', 'Joan Annal']),
+        ('AN', ['Anna Smith', 'Annabel Lee']),
+        ('emile', ['Émile Zola']),
+        ('nna', []),
+    ])
+    def test_autocomplete(self, search_client, term, names):
+        response = search_client.get(AUTOCOMPLETE_URL, {'q': term})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [user['name'] for user in response.data] == names
+
+    def test_autocomplete_limit(self, search_client, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = search_client.get(AUTOCOMPLETE_URL, {'q': 'ann', 'limit': 2})
+
+        assert [user['name'] for user in response.data] == ['Anna Smith', 'Annabel Lee']
+
+    def test_list_ranked(self, search_client):
+        response = search_client.get(USERS_URL, {'search': 'ann'})
+
+        assert response.data['count'] == 3
+        assert [user['name'] for user in response.data['results']] == ['Anna Smith', 'Annabel Lee', 'Joan Annal']
@@ -0,0 +1,25 @@
+from rest_framework_simplejwt import tokens
+
+# claims the stateless authentication trusts instead of loading the user
+USER_CLAIMS = ('uid', 'is_active', 'is_staff', 'is_superuser', 'generation')
+
+
+class UserClaimsMixin:
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['uid'] = user.id
+        token['is_active'] = user.is_active
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        token['generation'] = user.token_generation
+        return token
+
+
+class AccessToken(UserClaimsMixin, tokens.AccessToken):
+    pass
+
+
+class RefreshToken(UserClaimsMixin, tokens.RefreshToken):
+    """ Access tokens created from a refresh token copy its claims, so the claims are those of the login.
+    A change of the user bumps its token generation and makes them rejected. """
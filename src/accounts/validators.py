@@ -1,6 +1,7 @@
 from django.utils.translation import ugettext as _
 from rest_framework import serializers
 
+from .availability import is_email_taken
 from .models import User
 
 
@@ -14,10 +15,12 @@ class UserUniqueFieldsValidator(object):
             value = attrs.get(field, serializers.empty)
             if value == serializers.empty:
                 continue
-            qs = User.all.filter(**{field: value})
-            if self.request and self.request.user:
-                qs = qs.exclude(id=self.request.user.id)
-            if qs.exists():
+            exclude_user_id = self.request.user.id if self.request and self.request.user else None
+            if field == 'email':
+                taken = is_email_taken(value, exclude_user_id)
+            else:
+                taken = User.all.filter(**{field: value}).exclude(id=exclude_user_id).exists()
+            if taken:
                 field_pretty = field.replace('_', ' ').capitalize()
                 raise serializers.ValidationError({
                     field: _('%(field)s is already taken.') % {'field': field_pretty}
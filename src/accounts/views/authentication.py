@@ -3,7 +3,7 @@ from drf_yasg.utils import swagger_auto_schema
 from django.utils.decorators import method_decorator
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from ..serializers.authentication import TokenObtainSerializer
+from ..serializers.authentication import LoginSerializer, TokenObtainSerializer
 
 
 @method_decorator(name='post', decorator=swagger_auto_schema(
@@ -11,7 +11,7 @@ from ..serializers.authentication import TokenObtainSerializer
     responses={'200': TokenObtainSerializer()},
 ))
 class LoginAPIView(TokenObtainPairView):
-    pass
+    serializer_class = LoginSerializer
 
 
 @method_decorator(name='post', decorator=swagger_auto_schema(
@@ -1,10 +1,12 @@
 from drf_yasg.utils import swagger_auto_schema
 
 from django.utils.decorators import method_decorator
-from rest_framework import generics, filters
+from rest_framework import generics
+from rest_framework.response import Response
 
+from .. import search
 from ..models import User
-from ..serializers.users import MeSerializer, UseSerializer
+from ..serializers.users import MeSerializer, UseSerializer, UserAutocompleteSerializer
 
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
@@ -29,5 +31,21 @@ class MeAPIView(generics.RetrieveUpdateAPIView):
 class UserListAPIView(generics.ListAPIView):
     serializer_class = UseSerializer
     queryset = User.objects.all()
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (search.UserSearchFilter,)
     search_fields = ('name',)
+
+
+@method_decorator(name='get', decorator=swagger_auto_schema(
+    operation_summary='[User Autocomplete] Retrieve top users with names matching the beginning of a search term.',
+    query_serializer=UserAutocompleteSerializer,
+))
+class UserAutocompleteAPIView(generics.GenericAPIView):
+    serializer_class = UseSerializer
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        params = UserAutocompleteSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        users = search.autocomplete(params.validated_data['q'], params.validated_data['limit'])
+        serializer = self.get_serializer(users, many=True)
+        return Response(serializer.data)
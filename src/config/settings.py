@@ -1,4 +1,5 @@
 import os
+import tempfile
 import dj_database_url
 from datetime import timedelta
 
@@ -28,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     # Local apps
+    'core.apps.CoreConfig',
     'accounts.apps.AccountsConfig',
     'payments.apps.PaymentsConfig',
 
@@ -81,6 +83,22 @@ DATABASES = {
     'default': dj_database_url.config(conn_max_age=600, default='sqlite:///db.sqlite3')
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Argon2 with OWASP parameters is preferred, passwords hashed with PBKDF2 or weaker Argon2 parameters before
+# are rehashed on login. Django's Argon2PasswordHasher must not be listed, it has the same algorithm name
+# and would verify argon2 hashes in place of the project's hasher, which would rehash them on every login
+PASSWORD_HASHERS = [
+    'accounts.hashing.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -111,20 +129,35 @@ USE_TZ = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.JSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.JSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
     'ORDERING_PARAM': 'ordering',
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
+        'core.throttling.AnonRateThrottle',
+        'core.throttling.ScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/minute',
+        'transactions': '60/minute',
+        'transaction-batches': '10/minute',
+        'exchange-currency': '30/minute',
     }
 }
 
@@ -171,6 +204,34 @@ if SPARKPOST_API_KEY:
 
 FRONT_HOSTNAME = 'https://example.com/'
 
+# Only record transactions as pending in requests, `settle_transactions` workers settle them
+PAYMENTS_ASYNC_SETTLEMENT = os.environ.get('PAYMENTS_ASYNC_SETTLEMENT') == 'True'
+
+# Seconds a stored response is replayed for a repeated Idempotency-Key header
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# Access tokens each worker keeps authenticated without querying their users, and for how many seconds
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', 10000))
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
+# SQLite database with the throttle state shared by all workers of a node
+THROTTLE_DATABASE = os.environ.get(
+    'THROTTLE_DATABASE',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'dinero-throttle.sqlite3'),
+)
+
+# Target false positive rate of the email filter, and seconds emails given to users are kept in the log
+# the filters catch up from
+EMAIL_FILTER_ERROR_RATE = float(os.environ.get('EMAIL_FILTER_ERROR_RATE', 0.01))
+EMAIL_LOG_RETENTION = int(os.environ.get('EMAIL_LOG_RETENTION', 24 * 60 * 60))
+
+# Passwords hashed at once by each worker, by default the CPUs of the node are shared by its gunicorn workers.
+# Workers must serve requests with threads (gthread) for other requests to go on while passwords are hashed
+PASSWORD_HASHING_WORKERS = int(os.environ.get(
+    'PASSWORD_HASHING_WORKERS',
+    max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', 1))),
+))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -180,6 +241,14 @@ LOGGING = {
         },
     },
     'loggers': {
+        'payments': {
+            'level': os.environ.get('PAYMENTS_LOG_LEVEL', 'WARNING'),
+            'handlers': ['console', ],
+        },
+        'accounts': {
+            'level': os.environ.get('ACCOUNTS_LOG_LEVEL', 'WARNING'),
+            'handlers': ['console', ],
+        },
         # 'django.db.backends': {
         #     'level': 'DEBUG',
         #     'handlers': ['console', ],
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# built in a background thread of each process serving requests, checks query the database until it's ready
+from accounts.availability import email_filter  # noqa: E402
+
+email_filter.rebuild_in_background()
@@ -0,0 +1,100 @@
+import pytest
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.availability import email_filter
+from accounts.models import User
+from core import throttling
+from core.generators import fake, DEFAULT_USER_PASSWORD
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # cached versions and snapshots are keyed by ids, which are reused by the following tests
+    cache.clear()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def throttle_store(tmp_path_factory):
+    """ Throttle state of the test run, apart from the `THROTTLE_DATABASE` shared by servers on the machine. """
+
+    store = throttling.ThrottleStore(str(tmp_path_factory.mktemp('throttle') / 'throttle.sqlite3'))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(throttling, 'store', store)
+        yield store
+
+
+@pytest.fixture(autouse=True)
+def clear_throttle_store(throttle_store):
+    # throttle keys contain user ids, which are reused by the following tests
+    throttle_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_email_filter(monkeypatch):
+    # built on demand by tests, background threads don't see the data of test transactions
+    monkeypatch.setattr(email_filter, 'rebuild_in_background', lambda: None)
+    email_filter.reset()
+    yield
+    email_filter.reset()
+
+
+@pytest.fixture
+def other_process():
+    """ Context in which the default cache is a separate one, as in another process. Only the database is shared. """
+
+    return override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-process'},
+    })
+
+
+@pytest.fixture
+def create_user():
+    """ Factory of active users with the default password. """
+
+    def create(**kwargs):
+        kwargs.setdefault('name', fake.name())
+        return User.objects.create_user(fake.safe_email(), DEFAULT_USER_PASSWORD, **kwargs)
+
+    return create
+
+
+@pytest.fixture
+def create_client():
+    """ Factory of API clients authenticated as the given user, available as `client.user`. """
+
+    def create(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        client.user = user
+        return client
+
+    return create
+
+
+@pytest.fixture
+def user(create_user):
+    return create_user()
+
+
+@pytest.fixture
+def users(create_user):
+    return [create_user() for __ in range(3)]
+
+
+@pytest.fixture
+def access_token(user):
+    return str(AccessToken.for_user(user))
+
+
+@pytest.fixture
+def authorised_client(user, access_token):
+    """ API client sending the user's access token, so it goes through authentication. """
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+    client.user = user
+    return client
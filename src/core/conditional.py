@@ -0,0 +1,86 @@
+import math
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from core.versions import get_version
+
+
+class VersionedMixin:
+    """ View of data guarded by the `core.models.Version` stored under `version_key`, which is bumped
+    whenever the data changes. The version is read from the database once per request. """
+
+    version_key = None
+
+    def get_version(self):
+        if getattr(self, 'current_version', None) is None:
+            self.current_version = get_version(self.version_key)
+        return self.current_version
+
+
+class ConditionalGetMixin(VersionedMixin):
+    """ Answer conditional GET requests from the version of the underlying data, so a client that has the current
+    representation gets 304 before anything is queried or serialized. The ETag is the version and Last-Modified
+    the time of its bump. Both come from the database, so every process answers the same way. """
+
+    def get_validators(self):
+        """ Return the ETag and the Last-Modified timestamp of the current version. The timestamp grows with every
+        bump, even when the change was a deletion, so `If-Modified-Since` can't match a changed version. """
+
+        version = self.get_version()
+        return quote_etag(str(version.value)), math.ceil(version.bumped_at.timestamp())
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class RenderedResponseCacheMixin(VersionedMixin):
+    """ Serve GET responses as bytes rendered for the current version of the underlying data, so repeated
+    requests skip querying, serialization and rendering. Rendered bodies are cached per version, media type
+    and language. The version is read from the database, so a bump made by any process makes old ones
+    unreachable in all of them until they expire. The browsable API embeds request specific forms,
+    it is never cached. """
+
+    rendered_timeout = 24 * 60 * 60
+    uncached_formats = ('api',)
+
+    def get_rendered_cache_key(self, request):
+        version = self.get_version().value
+        media_type = request.accepted_media_type.replace(' ', '')
+        return f'{self.version_key}:{version}:rendered:{media_type}:{translation.get_language()}'
+
+    def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format in self.uncached_formats:
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_rendered_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content_type, content = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == 200:
+                self.rendered_cache_key = key
+
+        patch_vary_headers(response, ('Accept', 'Accept-Language'))
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, 'rendered_cache_key', None)
+        if key is not None:
+            response.render()
+            cache.set(key, (response['Content-Type'], response.content), timeout=self.rendered_timeout)
+        return response
@@ -22,6 +22,13 @@ header_fields_auth = [
     openapi.Parameter('Authorization', in_=openapi.IN_HEADER, type=openapi.TYPE_STRING, default=f'{JWT_PREFIX} Token'),
 ]
 
+header_fields_idempotency = [
+    openapi.Parameter(
+        'Idempotency-Key', in_=openapi.IN_HEADER, type=openapi.TYPE_STRING,
+        description='Unique key of the request, a retry with the same key replays the first response.',
+    ),
+]
+
 query_fields_pagination = [
     openapi.Parameter('limit', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=10),
     openapi.Parameter('offset', in_=openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=0),
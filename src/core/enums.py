@@ -61,3 +61,9 @@ class TransactionStatus(ChoicesEnum):
     PENDING = 'PENDING'
     SUCCESSFUL = 'SUCCESSFUL'
     CANCELED = 'CANCELED'
+
+
+class LedgerEntryType(ChoicesEnum):
+    TRANSACTION = 'TRANSACTION'
+    EXCHANGE = 'EXCHANGE'
+    ADJUSTMENT = 'ADJUSTMENT'
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.10 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Version',
+            fields=[
+                ('key', models.CharField(max_length=128, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField()),
+                ('bumped_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
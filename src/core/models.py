@@ -9,3 +9,15 @@ class CreatedUpdatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Version(models.Model):
+    """ Version of data that processes derive and cache, e.g. exchange rate tables or rendered lists.
+    It lives in the database, so a bump made by any process, command or admin is seen by all of them. """
+
+    key = models.CharField(max_length=128, primary_key=True)
+    value = models.BigIntegerField()
+    bumped_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.key}: {self.value}'
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+
+from django.db import connection
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """ Pagination over descending primary keys. The cursor is the last id of the previous page,
+    so every page is an index range scan of `limit` rows: no `COUNT(*)` and no `OFFSET`.
+
+    Views can define `get_keyset_branches` returning disjoint conditions whose union equals the filter
+    of their queryset. Each branch is then scanned on its own index and the branches are combined
+    with `UNION ALL`, which avoids an OR condition that databases can't serve from a single index. """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.cursor = self.get_cursor(request)
+
+        branches = view.get_keyset_branches() if hasattr(view, 'get_keyset_branches') else None
+        if branches:
+            ids = self.get_union_ids(queryset, branches)
+            page = list(queryset.filter(pk__in=ids[:self.limit]).order_by('-pk')) if ids else []
+        else:
+            if self.cursor is not None:
+                queryset = queryset.filter(pk__lt=self.cursor)
+            page = list(queryset.order_by('-pk')[:self.limit + 1])
+            ids = [obj.pk for obj in page]
+            page = page[:self.limit]
+
+        self.next_cursor = ids[self.limit - 1] if len(ids) > self.limit else None
+        return page
+
+    def get_union_ids(self, queryset, branches):
+        """ Return up to `limit + 1` ids following the cursor, taken from the union of all branches.
+        Branches only select ids, the rows of the page are fetched afterwards by primary key. """
+
+        manager = queryset.model._default_manager
+        querysets = []
+        for condition in branches:
+            branch = manager.filter(condition)
+            if self.cursor is not None:
+                branch = branch.filter(pk__lt=self.cursor)
+            if connection.features.supports_slicing_ordering_in_compound:
+                branch = branch.order_by('-pk')[:self.limit + 1]
+            else:
+                branch = branch.order_by()
+            querysets.append(branch.values_list('pk', flat=True))
+
+        union = querysets[0].union(*querysets[1:], all=True)
+        return list(union.order_by('-pk')[:self.limit + 1])
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(request.query_params[self.limit_query_param], strict=True, cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor is None:
+            return None
+        try:
+            return _positive_int(cursor, strict=True)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
@@ -0,0 +1,38 @@
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+# values without native support, e.g. lazy translations, decimals or querysets, are handled like DRF does
+encode_default = JSONEncoder().default
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """ Drop-in replacement of DRF's JSON renderer built on orjson, which encodes datetimes,
+    enums and floats natively and returns bytes directly. """
+
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_default, option=options)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """ Binary MessagePack representation for internal service clients, negotiated with
+    `Accept: application/msgpack`. Values are encoded with the same types as in JSON. """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
@@ -0,0 +1,150 @@
+import os
+import random
+import sqlite3
+import threading
+
+from django.conf import settings
+from rest_framework import throttling
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS throttle ('
+    'key TEXT PRIMARY KEY, value REAL NOT NULL, stamp REAL NOT NULL, expires_at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS throttle_expires_at ON throttle (expires_at)',
+)
+
+# share of checks that also delete expired state
+PURGE_PROBABILITY = 0.001
+
+
+class ThrottleStore:
+    """ Throttle state in a SQLite database shared by all workers of a node, by default in shared memory.
+    Every check reads and writes a constant number of rows in one immediate transaction,
+    which SQLite serializes between processes. Connections are opened per thread and per process. """
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def get_connection(self):
+        if getattr(self.local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # the state is disposable, it doesn't have to survive a crash
+            connection.execute('PRAGMA synchronous=OFF')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+    def check(self, algorithm, key, limit, duration, now):
+        """ Run the algorithm for the key in an immediate transaction, return whether the request is allowed
+        and how many seconds to wait before the next one would be. """
+
+        connection = self.get_connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = algorithm(connection, key, limit, duration, now)
+            if random.random() < PURGE_PROBABILITY:
+                connection.execute('DELETE FROM throttle WHERE expires_at < ?', (now,))
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    def clear(self):
+        self.get_connection().execute('DELETE FROM throttle')
+
+
+def read(connection, key):
+    return connection.execute('SELECT value, stamp FROM throttle WHERE key = ?', (key,)).fetchone()
+
+
+def write(connection, key, value, stamp, expires_at):
+    connection.execute(
+        'INSERT OR REPLACE INTO throttle (key, value, stamp, expires_at) VALUES (?, ?, ?, ?)',
+        (key, value, stamp, expires_at),
+    )
+
+
+def token_bucket(connection, key, capacity, duration, now):
+    """ Bucket of `capacity` tokens refilled evenly over `duration` seconds, a request takes one token.
+    Bursts up to the capacity are allowed. """
+
+    rate = capacity / duration
+    row = read(connection, key)
+    tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    # a bucket left alone for the duration is full again, it's the same as no bucket
+    write(connection, key, tokens, now, now + duration)
+    return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+def sliding_window(connection, key, limit, duration, now):
+    """ Sliding window counter: requests counted in the previous fixed window are weighted by the part
+    of it the sliding window still covers. """
+
+    window = int(now // duration)
+    start = window * duration
+    previous = read(connection, f'{key}:{window - 1}')
+    previous = previous[0] if previous else 0
+    current = read(connection, f'{key}:{window}')
+    current = current[0] if current else 0
+
+    weight = 1 - (now - start) / duration
+    allowed = previous * weight + current + 1 <= limit
+    if allowed:
+        write(connection, f'{key}:{window}', current + 1, start, start + 2 * duration)
+        return True, 0
+
+    # the request is allowed once the weight of the previous window drops enough, or in the next window
+    if previous and current + 1 <= limit:
+        wait = start + duration * (1 - (limit - current - 1) / previous) - now
+    else:
+        wait = start + duration - now
+    return False, max(wait, 0)
+
+
+ALGORITHMS = {
+    'token-bucket': token_bucket,
+    'sliding-window': sliding_window,
+}
+
+store = ThrottleStore(settings.THROTTLE_DATABASE)
+
+
+class SharedRateThrottle(throttling.SimpleRateThrottle):
+    """ Rate throttle keeping its state in the node-wide `ThrottleStore` instead of the cache,
+    checked in constant time with the algorithm named by `algorithm`. """
+
+    algorithm = 'sliding-window'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.retry_after = store.check(
+            ALGORITHMS[self.algorithm], self.key, self.num_requests, self.duration, self.timer(),
+        )
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, SharedRateThrottle):
+    pass
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, SharedRateThrottle):
+    """ Per-user limits of views that set `throttle_scope`. Token buckets let users send short bursts. """
+
+    algorithm = 'token-bucket'
@@ -1,3 +1,8 @@
+import unicodedata
+
+from django.db import connection
+
+
 def get_or_create_m2m(instance, m2m_name, items, **kwargs):
     """ Helper method which extract model after m2m_name, then gets or creates new instance for every item
     in items list. Finally it connects m2m_name to dedicated instance. """
@@ -52,3 +57,23 @@ def update_fk_multiple(instance, field_name, field_values, field_key):
 
 def response_ok(detail):
     return {'detail': detail}
+
+
+def bulk_create_with_pk(model, objs, batch_size=None):
+    """ `bulk_create` which guarantees that primary keys of created objects are set.
+    Databases that can't return ids from a bulk insert fall back to inserting row by row. """
+
+    if connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def normalize_search_text(value):
+    """ Lowercase value without accents and repeated whitespace, the form searched text is stored and matched in. """
+
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(value.casefold().split())
@@ -0,0 +1,44 @@
+import datetime
+import time
+
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Version
+
+
+def _seed():
+    # microseconds since epoch, a version recreated after its row was deleted starts above any value it had
+    return time.time_ns() // 1000
+
+
+def get_version(key):
+    """ Return the `Version` stored under key, creating it if it doesn't exist yet. """
+
+    version = Version.objects.filter(key=key).first()
+    if version is None:
+        Version.objects.bulk_create([Version(key=key, value=_seed())], ignore_conflicts=True)
+        version = Version.objects.get(key=key)
+    return version
+
+
+def bump_versions(*keys):
+    """ Invalidate everything derived from data guarded by the keys with a single UPDATE.
+    The bump time grows by at least a second, so it can serve as Last-Modified of every version.
+    A bump racing with the creation of a missing version is lost, which is harmless:
+    the version is created after the data it guards was committed. """
+
+    keys = sorted(set(keys))
+    now = timezone.now()
+    updated = Version.objects.filter(key__in=keys).update(
+        value=F('value') + 1,
+        bumped_at=Greatest(Value(now, output_field=DateTimeField()), F('bumped_at') + datetime.timedelta(seconds=1)),
+    )
+    if updated < len(keys):
+        existing = set(Version.objects.filter(key__in=keys).values_list('key', flat=True))
+        Version.objects.bulk_create([
+            Version(key=key, value=_seed(), bumped_at=now)
+            for key in keys
+            if key not in existing
+        ], ignore_conflicts=True)
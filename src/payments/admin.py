@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Currency, Wallet, Transaction, ExchangeRate
+from . import ledger, stripes, transfers
+from .models import Currency, Wallet, Transaction, ExchangeRate, ExchangeRateHistory, Exchange, LedgerEntry
 
 
 @admin.register(Currency)
@@ -14,12 +15,32 @@ class CurrencyAdmin(admin.ModelAdmin):
 class WalletAdmin(admin.ModelAdmin):
     autocomplete_fields = ('user', 'currency')
     list_display = ('name', 'currency', 'user')
-    fields = ('name', 'user', 'currency', 'balance')
+    fields = ('name', 'user', 'currency', 'balance', 'stripes')
     search_fields = ('name',)
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user')
 
+    def save_model(self, request, obj, form, change):
+        """ Balance and stripes are changed by the transfer engine under the row lock of the wallet,
+        so transfers made since the form was loaded aren't overwritten. """
+
+        balance, count = obj.balance, obj.stripes
+        if change:
+            obj.stripes = form.initial['stripes']
+            update_fields = [name for name in form.changed_data if name not in ('balance', 'stripes')]
+            if update_fields:
+                obj.save(update_fields=update_fields)
+            if 'balance' in form.changed_data:
+                transfers.set_balance(obj, balance)
+        else:
+            obj.stripes = 0
+            super().save_model(request, obj, form, change)
+            if obj.balance:
+                ledger.record_adjustment(obj, obj.balance)
+        if count != obj.stripes:
+            stripes.configure(obj, count)
+
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -50,3 +71,52 @@ class ExchangeRateAdmin(admin.ModelAdmin):
     autocomplete_fields = ('from_currency', 'to_currency',)
     list_display = ('from_currency', 'to_currency', 'amount')
     fields = ('from_currency', 'to_currency', 'amount')
+
+
+@admin.register(ExchangeRateHistory)
+class ExchangeRateHistoryAdmin(admin.ModelAdmin):
+    list_display = ('from_currency', 'to_currency', 'amount', 'effective_at')
+    fields = ('from_currency', 'to_currency', 'amount', 'effective_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('from_currency', 'to_currency')
+
+
+@admin.register(Exchange)
+class ExchangeAdmin(admin.ModelAdmin):
+    list_display = ('from_wallet', 'to_wallet', 'from_amount', 'to_amount', 'rate')
+    fields = ('from_wallet', 'to_wallet', 'from_amount', 'to_amount', 'rate', 'created_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('wallet', 'type', 'amount', 'created_at')
+    list_filter = ('type',)
+    fields = ('wallet', 'type', 'amount', 'transaction', 'exchange', 'created_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('wallet')
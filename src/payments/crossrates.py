@@ -0,0 +1,93 @@
+import numpy as np
+
+MAX_HOPS = 3
+
+
+class RateMatrix:
+    """ Dense matrix of conversion rates between all currencies.
+
+    Stored rates are used as they are. A missing pair falls back to the inverse of the stored opposite
+    rate, and then to the best (highest product) path of up to `max_hops` conversions through other
+    currencies, which covers triangulation through a base currency. Best paths are kept per hop count,
+    so a single rate that goes up or appears is applied incrementally in O(hops³ · n²). Any other
+    change rebuilds the matrix in O(hops · n³). """
+
+    def __init__(self, codes, rates, max_hops=MAX_HOPS):
+        self.codes = list(codes)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.max_hops = max_hops
+        self.rates = dict(rates)
+        self.build()
+
+    @property
+    def size(self):
+        return len(self.codes)
+
+    def get_edges(self):
+        """ Single-hop rates: stored ones completed with inverses of stored opposite rates. """
+        edges = np.zeros((self.size, self.size))
+        for (from_code, to_code), rate in self.rates.items():
+            if rate > 0 and from_code in self.index and to_code in self.index and from_code != to_code:
+                edges[self.index[from_code], self.index[to_code]] = rate
+
+        inverse = np.divide(1, edges.T, out=np.zeros_like(edges), where=edges.T > 0)
+        return np.where(edges > 0, edges, inverse)
+
+    def build(self):
+        self.edges = self.get_edges()
+        self.paths = [np.identity(self.size), self.edges.copy()]
+        for __ in range(self.max_hops - 1):
+            self.paths.append(self.relax(self.paths[-1]))
+        self.compose()
+
+    def relax(self, paths):
+        """ Extend best paths by one more conversion. """
+        result = paths.copy()
+        for k in range(self.size):
+            np.maximum(result, np.outer(paths[:, k], self.edges[k, :]), out=result)
+        return result
+
+    def compose(self):
+        self.matrix = np.where(self.edges > 0, self.edges, self.paths[-1])
+        np.fill_diagonal(self.matrix, 1)
+
+    def update(self, from_code, to_code, rate):
+        """ Apply a change of a single stored rate. """
+        if from_code not in self.index or to_code not in self.index:
+            self.rates[from_code, to_code] = rate
+            for code in (from_code, to_code):
+                if code not in self.index:
+                    self.index[code] = len(self.codes)
+                    self.codes.append(code)
+            self.build()
+            return
+
+        self.rates[from_code, to_code] = rate
+        edges = self.get_edges()
+        changed = np.argwhere(edges != self.edges)
+
+        if any(edges[u, v] < self.edges[u, v] for u, v in changed):
+            self.build()
+            return
+
+        self.edges = edges
+        for u, v in changed:
+            paths = [hop.copy() for hop in self.paths]
+            for hops in range(1, self.max_hops + 1):
+                for before, after in self.splits(hops):
+                    candidate = np.outer(paths[before][:, u], paths[after][v, :]) * edges[u, v]
+                    np.maximum(self.paths[hops], candidate, out=self.paths[hops])
+        self.compose()
+
+    @staticmethod
+    def splits(hops):
+        """ Hop counts before and after the changed edge for paths of at most `hops` conversions. """
+        return [(before, after) for before in range(hops) for after in range(hops - before)]
+
+    def get(self, from_code, to_code):
+        """ Return the conversion rate or None if currencies are not connected. """
+        try:
+            rate = self.matrix[self.index[from_code], self.index[to_code]]
+        except KeyError:
+            return None
+        return float(rate) if rate > 0 else None
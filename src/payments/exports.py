@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import Transaction
+
+EXPORT_CHUNK_SIZE = 2000
+
+COLUMNS = (
+    'id',
+    'status',
+    'from_user_id',
+    'from_user__name',
+    'to_user_id',
+    'to_user__name',
+    'amount',
+    'currency__code',
+    'currency__name',
+    'paid_at',
+)
+
+# spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def get_history_rows(user):
+    """ Iterate over all transactions sent or received by the user, newest first, as tuples of `COLUMNS`.
+    Sent and received transactions are read as two indexed branches combined with `UNION ALL`.
+    Rows are fetched in chunks through a server-side cursor where the database supports it,
+    so memory use doesn't depend on the length of the history. """
+
+    branches = [
+        Transaction.objects.filter(condition).order_by().values_list(*COLUMNS)
+        for condition in (Q(from_user=user), Q(to_user=user))
+    ]
+    union = branches[0].union(branches[1], all=True).order_by('-id')
+    return union.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def chunked(lines, size=EXPORT_CHUNK_SIZE):
+    """ Join rendered lines into chunks, so a response isn't written row by row. """
+
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def render_ndjson(rows):
+    for row in rows:
+        (transaction_id, status, from_user_id, from_user_name, to_user_id, to_user_name,
+         amount, currency_code, currency_name, paid_at) = row
+        yield json.dumps({
+            'id': transaction_id,
+            'status': status,
+            'from_user': {'id': from_user_id, 'name': from_user_name},
+            'to_user': {'id': to_user_id, 'name': to_user_name},
+            'amount': amount,
+            'currency': {'name': currency_name, 'code': currency_code},
+            'paid_at': paid_at,
+        }, cls=DjangoJSONEncoder) + '\n'
+
+
+def escape_formula(value):
+    """ Prefix text that a spreadsheet would evaluate as a formula with a quote, so it stays text. """
+
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def render_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def render(row):
+        writer.writerow(row)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield render(column.replace('__', '_') for column in COLUMNS)
+    for row in rows:
+        yield render(escape_formula(value) for value in row)
+
+
+RENDERERS = {
+    'ndjson': (render_ndjson, 'application/x-ndjson'),
+    'csv': (render_csv, 'text/csv'),
+}
+
+
+def export_history(user, export_format):
+    """ Return a generator of the user's transaction history rendered in chunks and its content type. """
+
+    render, content_type = RENDERERS[export_format]
+    return chunked(render(get_history_rows(user))), content_type
@@ -0,0 +1,66 @@
+import bisect
+from functools import reduce
+from operator import or_
+
+from django.db.models import Max, Q
+
+from .models import ExchangeRateHistory
+
+
+def record(rates, effective_at=None):
+    """ Append current values of given exchange rates to the history. """
+
+    return ExchangeRateHistory.objects.bulk_create([
+        ExchangeRateHistory(
+            from_currency_id=rate.from_currency_id,
+            to_currency_id=rate.to_currency_id,
+            amount=rate.amount,
+            effective_at=effective_at or rate.updated_at,
+        )
+        for rate in rates
+    ], batch_size=1000)
+
+
+def get_rates_as_of(points):
+    """ Price a batch of `(from_currency_id, to_currency_id, timestamp)` points with the rate that was
+    effective at each timestamp, None if there was no rate yet. The whole batch is served by two queries:
+    the floor of each pair, the last rate effective at the earliest timestamp, and then an index range
+    scan per pair between its floor and the latest timestamp. Points are resolved in memory with a binary search. """
+
+    points = list(points)
+    if not points:
+        return []
+
+    pairs = {(from_id, to_id) for from_id, to_id, __ in points}
+    earliest = min(timestamp for __, __, timestamp in points)
+    latest = max(timestamp for __, __, timestamp in points)
+
+    floors = {
+        (from_id, to_id): floor
+        for from_id, to_id, floor in ExchangeRateHistory.objects.filter(
+            reduce(or_, (Q(from_currency_id=from_id, to_currency_id=to_id) for from_id, to_id in pairs)),
+            effective_at__lte=earliest,
+        ).values('from_currency_id', 'to_currency_id').annotate(
+            floor=Max('effective_at'),
+        ).order_by().values_list('from_currency_id', 'to_currency_id', 'floor')
+    }
+
+    # pairs without a rate at the earliest timestamp are read from their start
+    rows = ExchangeRateHistory.objects.filter(reduce(or_, (
+        Q(from_currency_id=from_id, to_currency_id=to_id, effective_at__lte=latest)
+        & (Q(effective_at__gte=floors[from_id, to_id]) if (from_id, to_id) in floors else Q())
+        for from_id, to_id in pairs
+    ))).order_by('effective_at', 'id').values_list('from_currency_id', 'to_currency_id', 'effective_at', 'amount')
+
+    series = {pair: ([], []) for pair in pairs}
+    for from_id, to_id, effective_at, amount in rows:
+        timestamps, amounts = series[from_id, to_id]
+        timestamps.append(effective_at)
+        amounts.append(amount)
+
+    result = []
+    for from_id, to_id, timestamp in points:
+        timestamps, amounts = series[from_id, to_id]
+        position = bisect.bisect_right(timestamps, timestamp)
+        result.append(amounts[position - 1] if position else None)
+    return result
@@ -0,0 +1,115 @@
+import datetime
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.transaction import atomic
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+PURGE_CHUNK_SIZE = 1000
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Idempotency key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+def get_expiry():
+    return timezone.now() - datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def acquire(user, key, path, fingerprint):
+    """ Claim the key for the current request, must be called inside a transaction.
+    Returns the key record and whether the request should be executed.
+
+    The claim is an INSERT into a unique index: a concurrent request with the same key blocks on it
+    until the first one commits or rolls back, and then either replays its stored response
+    or claims the key itself. """
+
+    try:
+        with atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, path=path, fingerprint=fingerprint), True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.select_for_update().get(user=user, key=key)
+    if record.created_at < get_expiry():
+        record.path = path
+        record.fingerprint = fingerprint
+        record.status_code = None
+        record.response = ''
+        record.created_at = timezone.now()
+        record.save()
+        return record, True
+
+    if record.path != path or record.fingerprint != fingerprint:
+        raise IdempotencyKeyReused()
+    return record, False
+
+
+def store(record, response):
+    record.status_code = response.status_code
+    record.response = json.dumps(response.data, cls=JSONEncoder)
+    record.save(update_fields=['status_code', 'response'])
+
+
+def replay(record):
+    response = Response(json.loads(record.response), status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """ Make a view method replay its stored response when a request is repeated with the same
+    `Idempotency-Key` header. The key is claimed, the request is handled and its response is stored
+    in one database transaction, so a failed request releases the key and nothing is stored.
+    Requests without the header are handled as usual. """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            raise serializers.ValidationError({
+                HEADER: f'Ensure this header has no more than {MAX_KEY_LENGTH} characters.',
+            })
+
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        with atomic():
+            record, execute = acquire(request.user, key, request.path, fingerprint)
+            if not execute:
+                return replay(record)
+
+            response = view_method(self, request, *args, **kwargs)
+            store(record, response)
+        return response
+
+    return wrapper
+
+
+def purge():
+    """ Delete expired keys in chunks, so the purge doesn't hold long locks.
+    Returns the number of deleted keys. """
+
+    expiry = get_expiry()
+    expired = IdempotencyKey.objects.filter(created_at__lt=expiry).values_list('id', flat=True)
+    deleted = 0
+    while True:
+        ids = list(expired[:PURGE_CHUNK_SIZE])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,93 @@
+from django.db.models import Max, Sum
+from django.db.transaction import atomic
+
+from . import stripes
+from .models import Wallet, LedgerEntry, BalanceCheckpoint
+from core.enums import LedgerEntryType
+
+
+def record_entries(deltas, type, transaction=None, exchange=None):
+    """ Append one ledger entry per wallet delta. Must be called in the same unit of work
+    and under the same wallet locks as the balance update it describes. """
+
+    return LedgerEntry.objects.bulk_create([
+        LedgerEntry(wallet_id=wallet_id, amount=delta, type=type, transaction=transaction, exchange=exchange)
+        for wallet_id, delta in deltas.items()
+    ])
+
+
+def record_transaction_entries(transactions, wallet_ids):
+    """ Append a debit and a credit entry for each transaction.
+    `wallet_ids` maps (user id, currency id) to the wallet id. """
+
+    entries = []
+    for transaction in transactions:
+        for user_id, amount in ((transaction.from_user_id, -transaction.amount),
+                                (transaction.to_user_id, transaction.amount)):
+            entries.append(LedgerEntry(
+                wallet_id=wallet_ids[user_id, transaction.currency_id],
+                amount=amount,
+                type=LedgerEntryType.TRANSACTION,
+                transaction=transaction,
+            ))
+    return LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def record_adjustment(wallet, amount):
+    """ Record a one-sided balance change, e.g. an opening balance or a manual correction. """
+
+    return LedgerEntry.objects.create(wallet=wallet, amount=amount, type=LedgerEntryType.ADJUSTMENT)
+
+
+def get_latest_checkpoint(wallet_id):
+    return BalanceCheckpoint.objects.filter(wallet_id=wallet_id).order_by('-id').first()
+
+
+def compute_balance(wallet_id):
+    """ Derive wallet balance from the nearest checkpoint and the entries appended after it.
+    Returns the balance together with the id of the last entry it includes. """
+
+    return _balance_since(wallet_id, get_latest_checkpoint(wallet_id))
+
+
+def _balance_since(wallet_id, checkpoint):
+    balance, last_entry_id = (checkpoint.balance, checkpoint.last_entry_id) if checkpoint else (0, 0)
+
+    tail = LedgerEntry.objects.filter(wallet_id=wallet_id, id__gt=last_entry_id).aggregate(
+        amount=Sum('amount'),
+        last_entry_id=Max('id'),
+    )
+    return balance + (tail['amount'] or 0), tail['last_entry_id'] or last_entry_id
+
+
+@atomic
+def checkpoint_wallet(wallet_id):
+    """ Store a new checkpoint for the wallet if any entry was appended since the previous one.
+    Stripes are locked as well, so no credit can append an entry while the checkpoint is taken. """
+
+    wallet = Wallet.objects.select_for_update().get(id=wallet_id)
+    if wallet.stripes:
+        stripes.sweep(wallet_id, clear=False)
+    checkpoint = get_latest_checkpoint(wallet_id)
+    balance, last_entry_id = _balance_since(wallet_id, checkpoint)
+
+    if last_entry_id == (checkpoint.last_entry_id if checkpoint else 0):
+        return None
+
+    return BalanceCheckpoint.objects.create(wallet_id=wallet_id, balance=balance, last_entry_id=last_entry_id)
+
+
+@atomic
+def rebuild_balance(wallet_id, save=True):
+    """ Recompute materialized `Wallet.balance` from the ledger.
+    Returns the wallet and the difference between its stored and ledger balance. """
+
+    wallet = Wallet.objects.select_for_update().get(id=wallet_id)
+    swept = stripes.sweep(wallet_id, clear=save) if wallet.stripes else 0
+    balance, _ = compute_balance(wallet_id)
+    drift = wallet.balance + swept - balance
+
+    if save and (drift or swept):
+        wallet.update(balance=balance)
+
+    return wallet, drift
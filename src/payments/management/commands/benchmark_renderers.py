@@ -0,0 +1,78 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer as DefaultJSONRenderer
+
+from accounts.models import User
+from core.enums import TransactionStatus
+from core.renderers import JSONRenderer, MessagePackRenderer
+from payments.models import Currency, ExchangeRate, Transaction
+from payments.serializers import ExchangeRateSerializer, TransactionSerializer
+
+RENDERERS = (
+    ('DRF json', DefaultJSONRenderer),
+    ('orjson', JSONRenderer),
+    ('msgpack', MessagePackRenderer),
+)
+
+CURRENCIES = [Currency(id=i, name=f'Currency {i}', code=f'C{i:03d}') for i in range(1, 51)]
+USERS = [User(id=i, name=f'User {i}') for i in range(1, 101)]
+
+
+def build_transactions(rows):
+    """ Unsaved transactions with related users and currencies, as they are loaded by list views. """
+
+    now = timezone.now()
+    return [
+        Transaction(
+            id=i,
+            from_user=random.choice(USERS),
+            to_user=random.choice(USERS),
+            currency=random.choice(CURRENCIES),
+            amount=round(random.uniform(1, 10000), 2),
+            status=TransactionStatus.SUCCESSFUL,
+            paid_at=now,
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+def build_exchange_rates(rows):
+    now = timezone.now()
+    return [
+        ExchangeRate(
+            id=i,
+            from_currency=random.choice(CURRENCIES),
+            to_currency=random.choice(CURRENCIES),
+            amount=random.uniform(0.01, 100),
+            updated_at=now,
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare encode time and payload size of the API renderers on transaction and exchange rate lists. '
+        'Lists are built in memory, the database is not touched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Number of rows in each list.')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of timed renders, the best one is reported.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        lists = (
+            ('transactions', TransactionSerializer(build_transactions(rows), many=True).data),
+            ('exchange rates', ExchangeRateSerializer(build_exchange_rates(rows), many=True).data),
+        )
+        for name, data in lists:
+            self.stdout.write(f'{name}, {rows} rows:')
+            for renderer_name, renderer_class in RENDERERS:
+                renderer = renderer_class()
+                payload = renderer.render(data)
+                seconds = min(timeit.repeat(lambda: renderer.render(data), number=1, repeat=options['repeat']))
+                self.stdout.write(f'  {renderer_name:<10} {seconds * 1000:8.2f} ms {len(payload):10} bytes')
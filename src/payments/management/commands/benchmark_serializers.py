@@ -0,0 +1,52 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.serializers import ListSerializer
+
+from payments.models import Wallet
+from payments.serializers import ExchangeRateSerializer, TransactionSerializer, WalletSerializer
+from .benchmark_renderers import CURRENCIES, USERS, build_exchange_rates, build_transactions
+
+
+def build_wallets(rows):
+    return [
+        Wallet(
+            id=i,
+            user=random.choice(USERS),
+            currency=random.choice(CURRENCIES),
+            name=f'Wallet {i}',
+            balance=round(random.uniform(0, 10000), 2),
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows per second of the default and the compiled list serialization of wallets, '
+        'transactions and exchange rates. Rows are built in memory, the database is not touched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of rows in each list.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs, the best one is reported.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        lists = (
+            ('wallets', WalletSerializer, build_wallets(rows)),
+            ('transactions', TransactionSerializer, build_transactions(rows)),
+            ('exchange rates', ExchangeRateSerializer, build_exchange_rates(rows)),
+        )
+        for name, serializer_class, instances in lists:
+            default = ListSerializer(instances, child=serializer_class())
+            compiled = serializer_class(instances, many=True)
+            assert default.to_representation(instances) == compiled.to_representation(instances)
+
+            self.stdout.write(f'{name}, {rows} rows:')
+            for label, serializer in (('default', default), ('compiled', compiled)):
+                seconds = min(timeit.repeat(
+                    lambda: serializer.to_representation(instances), number=1, repeat=options['repeat'],
+                ))
+                self.stdout.write(f'  {label:<10} {seconds * 1000:8.2f} ms {rows / seconds:12.0f} rows/s')
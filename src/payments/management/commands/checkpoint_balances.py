@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from payments import ledger
+from payments.models import Wallet
+
+
+class Command(BaseCommand):
+    help = 'Store balance checkpoints for wallets that have new ledger entries. Meant to be run periodically.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wallet', type=int, action='append', dest='wallets', help='Wallet id, can be repeated.')
+
+    def handle(self, *args, **options):
+        wallet_ids = options['wallets'] or Wallet.objects.order_by('id').values_list('id', flat=True).iterator()
+
+        created = 0
+        for wallet_id in wallet_ids:
+            if ledger.checkpoint_wallet(wallet_id):
+                created += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Created {created} balance checkpoints.'))
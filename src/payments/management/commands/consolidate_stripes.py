@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from payments import stripes
+from payments.models import Wallet
+
+
+class Command(BaseCommand):
+    help = 'Fold stripe sub-balances of striped wallets back into wallet balances. Meant to be run periodically.'
+
+    def handle(self, *args, **options):
+        wallet_ids = Wallet.objects.filter(stripes__gt=0).order_by('id').values_list('id', flat=True).iterator()
+
+        consolidated = 0
+        for wallet_id in wallet_ids:
+            if stripes.consolidate(wallet_id):
+                consolidated += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Consolidated stripes of {consolidated} wallets.'))
@@ -0,0 +1,115 @@
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from payments import history, rates
+from payments.models import Currency, ExchangeRate
+
+FORMATS = ('csv', 'json', 'jsonl')
+
+
+class Command(BaseCommand):
+    help = (
+        'Ingest exchange rates from a local feed file. CSV files need `from`, `to` and `rate` columns, '
+        'JSON files hold a list of objects with the same keys and JSON Lines files one object per line. '
+        'Only pairs whose rate changed are written.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the rate feed file.')
+        parser.add_argument('--format', choices=FORMATS, help='Feed format, guessed from file extension by default.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of rows written at once.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        feed_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if feed_format not in FORMATS:
+            raise CommandError(f'Unknown feed format "{feed_format}", use --format with one of {", ".join(FORMATS)}.')
+
+        self.currency_ids = dict(Currency.objects.values_list('code', 'id'))
+        self.stats = {'read': 0, 'created': 0, 'changed': 0, 'skipped': 0}
+        started = time.monotonic()
+
+        with open(path, newline='') as feed:
+            rows = self.read_rows(feed, feed_format)
+            while True:
+                chunk = list(itertools.islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+                self.ingest_chunk(chunk)
+                self.stdout.write(self.format_stats(time.monotonic() - started), ending='\r')
+
+        if self.stats['created'] or self.stats['changed']:
+            rates.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(self.format_stats(time.monotonic() - started)))
+
+    def read_rows(self, feed, feed_format):
+        if feed_format == 'csv':
+            yield from csv.DictReader(feed)
+        elif feed_format == 'json':
+            yield from json.load(feed)
+        else:
+            for line in feed:
+                if line.strip():
+                    yield json.loads(line)
+
+    def parse_chunk(self, chunk):
+        """ Resolve currency codes and rates, the last row wins if a pair repeats. """
+        parsed = {}
+        for row in chunk:
+            self.stats['read'] += 1
+            try:
+                pair = (self.currency_ids[row['from']], self.currency_ids[row['to']])
+                amount = float(row['rate'])
+            except (KeyError, TypeError, ValueError):
+                self.stats['skipped'] += 1
+                continue
+            if pair in parsed:
+                self.stats['skipped'] += 1
+            parsed[pair] = amount
+        return parsed
+
+    @atomic
+    def ingest_chunk(self, chunk):
+        parsed = self.parse_chunk(chunk)
+        existing = {
+            (rate.from_currency_id, rate.to_currency_id): rate
+            for rate in ExchangeRate.objects.filter(
+                from_currency_id__in={from_id for from_id, __ in parsed},
+                to_currency_id__in={to_id for __, to_id in parsed},
+            )
+        }
+
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for (from_id, to_id), amount in parsed.items():
+            rate = existing.get((from_id, to_id))
+            if rate is None:
+                to_create.append(ExchangeRate(from_currency_id=from_id, to_currency_id=to_id, amount=amount))
+            elif rate.amount != amount:
+                rate.amount = amount
+                rate.updated_at = now
+                to_update.append(rate)
+            else:
+                self.stats['skipped'] += 1
+
+        ExchangeRate.objects.bulk_create(to_create)
+        ExchangeRate.objects.bulk_update(to_update, ['amount', 'updated_at'])
+        history.record(to_create + to_update, effective_at=now)
+        self.stats['created'] += len(to_create)
+        self.stats['changed'] += len(to_update)
+
+    def format_stats(self, elapsed):
+        elapsed = max(elapsed, 1e-6)
+        return ', '.join(
+            f'{name} {count} ({count / elapsed:.0f}/s)'
+            for name, count in self.stats.items()
+        )
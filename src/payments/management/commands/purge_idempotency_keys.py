@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from payments import idempotency
+
+
+class Command(BaseCommand):
+    help = 'Delete stored idempotency keys older than IDEMPOTENCY_KEY_TTL seconds. Meant to be run periodically.'
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys.'))
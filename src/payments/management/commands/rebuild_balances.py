@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from payments import ledger
+from payments.models import Wallet
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized wallet balances from the nearest checkpoint and the ledger.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wallet', type=int, action='append', dest='wallets', help='Wallet id, can be repeated.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report wallets with drifted balances.')
+
+    def handle(self, *args, **options):
+        wallet_ids = options['wallets'] or Wallet.objects.order_by('id').values_list('id', flat=True).iterator()
+
+        drifted = 0
+        for wallet_id in wallet_ids:
+            wallet, drift = ledger.rebuild_balance(wallet_id, save=not options['dry_run'])
+            if drift:
+                drifted += 1
+                self.stdout.write(f'Wallet {wallet.id} balance drifted by {drift}.')
+
+        action = 'Found' if options['dry_run'] else 'Rebuilt'
+        self.stdout.write(self.style.SUCCESS(f'{action} {drifted} drifted wallet balances.'))
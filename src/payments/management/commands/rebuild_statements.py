@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+
+from accounts.models import User
+from payments import statements
+
+
+def rebuild_chunk(first_user_id, last_user_id):
+    try:
+        return statements.rebuild(first_user_id, last_user_id)
+    finally:
+        # every worker thread opens its own connection
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild monthly statement rollups from existing transactions and exchanges. Users are split into '
+        'chunks by id, each chunk is rebuilt in its own database transaction by one of parallel workers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of chunks rebuilt in parallel.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of user ids in a chunk.')
+
+    def handle(self, *args, **options):
+        bounds = User.all.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write(self.style.SUCCESS('There are no users.'))
+            return
+
+        chunk_size = options['chunk_size']
+        chunks = [
+            (first_user_id, min(first_user_id + chunk_size - 1, bounds['last']))
+            for first_user_id in range(bounds['first'], bounds['last'] + 1, chunk_size)
+        ]
+
+        written = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(rebuild_chunk, *chunk) for chunk in chunks]
+            for done, future in enumerate(futures, 1):
+                written += future.result()
+                self.stdout.write(f'Rebuilt {done}/{len(chunks)} chunks.', ending='\r')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} monthly statements of users {bounds["first"]}-{bounds["last"]}.'
+        ))
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from payments import transfers
+
+
+class Command(BaseCommand):
+    help = (
+        'Settle pending transactions. Every worker claims batches of pending transactions that no other '
+        'worker holds and settles each batch in one database transaction. Runs until interrupted, '
+        'more workers can be started in parallel from other processes or hosts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker threads.')
+        parser.add_argument('--batch-size', type=int, default=transfers.UPDATE_CHUNK_SIZE,
+                            help='Number of transactions claimed at once.')
+        parser.add_argument('--sleep', type=float, default=1, help='Seconds to wait when nothing is pending.')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as nothing is pending.')
+
+    def handle(self, *args, **options):
+        self.stopped = threading.Event()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(self.work, options) for __ in range(options['workers'])]
+            try:
+                settled = sum(future.result() for future in futures)
+            except KeyboardInterrupt:
+                self.stopped.set()
+                settled = sum(future.result() for future in futures)
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {settled} pending transactions.'))
+
+    def work(self, options):
+        processed = 0
+        try:
+            while not self.stopped.is_set():
+                claimed = transfers.settle_pending(options['batch_size'])
+                processed += claimed
+                if claimed:
+                    continue
+                if options['once']:
+                    break
+                self.stopped.wait(options['sleep'])
+        finally:
+            # every worker thread opens its own connection
+            connection.close()
+        return processed
@@ -0,0 +1,8 @@
+from django.db import models
+from django.db.models import Sum
+
+
+class WalletQuerySet(models.QuerySet):
+    def with_striped_balance(self):
+        """ Annotate sum of stripe sub-balances, so `Wallet.total_balance` doesn't query them per wallet. """
+        return self.annotate(striped_balance=Sum('stripe_set__balance'))
@@ -0,0 +1,79 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_opening_entries(apps, schema_editor):
+    """ Existing balances have no history, record them as opening adjustments. """
+    Wallet = apps.get_model('payments', 'Wallet')
+    LedgerEntry = apps.get_model('payments', 'LedgerEntry')
+    LedgerEntry.objects.bulk_create(
+        LedgerEntry(wallet_id=wallet_id, type='ADJUSTMENT', amount=balance)
+        for wallet_id, balance in Wallet.objects.exclude(balance=0).values_list('id', 'balance').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_wallet_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exchange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last updated at')),
+                ('from_amount', models.FloatField()),
+                ('to_amount', models.FloatField()),
+                ('rate', models.FloatField()),
+                ('from_wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='from_exchange_set', to='payments.Wallet')),
+                ('to_wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='to_exchange_set', to='payments.Wallet')),
+            ],
+            options={
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('TRANSACTION', 'TRANSACTION'), ('EXCHANGE', 'EXCHANGE'), ('ADJUSTMENT', 'ADJUSTMENT')], max_length=15)),
+                ('amount', models.FloatField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('exchange', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entry_set', to='payments.Exchange')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entry_set', to='payments.Transaction')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entry_set', to='payments.Wallet')),
+            ],
+            options={
+                'verbose_name_plural': 'Ledger entries',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_entry_id', models.IntegerField(default=0)),
+                ('balance', models.FloatField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoint_set', to='payments.Wallet')),
+            ],
+            options={
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['wallet', 'id'], name='payments_le_wallet__928977_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='balancecheckpoint',
+            index=models.Index(fields=['wallet', 'id'], name='payments_ba_wallet__990b71_idx'),
+        ),
+        migrations.RunPython(create_opening_entries, migrations.RunPython.noop),
+    ]
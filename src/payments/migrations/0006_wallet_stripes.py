@@ -0,0 +1,31 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='stripes',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of sub-balances incoming credits are spread over. Zero disables striping.'),
+        ),
+        migrations.CreateModel(
+            name='WalletStripe',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('balance', models.FloatField(default=0)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stripe_set', to='payments.Wallet')),
+            ],
+            options={
+                'unique_together': {('wallet', 'index')},
+            },
+        ),
+    ]
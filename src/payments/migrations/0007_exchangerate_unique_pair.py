@@ -0,0 +1,32 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:22
+
+from django.db import migrations
+
+
+def delete_duplicated_rates(apps, schema_editor):
+    """ Keep only the most recently updated rate of every currency pair. """
+    ExchangeRate = apps.get_model('payments', 'ExchangeRate')
+    seen = set()
+    duplicates = []
+    rates = ExchangeRate.objects.order_by('-updated_at', '-id').values_list('id', 'from_currency_id', 'to_currency_id')
+    for rate_id, from_currency_id, to_currency_id in rates.iterator():
+        pair = (from_currency_id, to_currency_id)
+        if pair in seen:
+            duplicates.append(rate_id)
+        seen.add(pair)
+    ExchangeRate.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_wallet_stripes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicated_rates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='exchangerate',
+            unique_together={('from_currency', 'to_currency')},
+        ),
+    ]
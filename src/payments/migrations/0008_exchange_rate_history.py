@@ -0,0 +1,47 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def seed_history(apps, schema_editor):
+    ExchangeRate = apps.get_model('payments', 'ExchangeRate')
+    ExchangeRateHistory = apps.get_model('payments', 'ExchangeRateHistory')
+    ExchangeRateHistory.objects.bulk_create(
+        ExchangeRateHistory(
+            from_currency_id=rate.from_currency_id,
+            to_currency_id=rate.to_currency_id,
+            amount=rate.amount,
+            effective_at=rate.updated_at,
+        )
+        for rate in ExchangeRate.objects.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_exchangerate_unique_pair'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateHistory',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.FloatField()),
+                ('effective_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('from_currency', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='payments.Currency')),
+                ('to_currency', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='payments.Currency')),
+            ],
+            options={
+                'verbose_name_plural': 'Exchange rate history',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='exchangeratehistory',
+            index=models.Index(fields=['from_currency', 'to_currency', 'effective_at'], name='payments_ex_from_cu_574bbb_idx'),
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_exchange_rate_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['from_user', 'id'], name='payments_tr_from_us_503327_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['to_user', 'id'], name='payments_tr_to_user_412496_idx'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='from_user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='from_transaction_set', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='to_user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='to_transaction_set', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0009_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyStatement',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month.')),
+                ('sent_amount', models.FloatField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('received_amount', models.FloatField(default=0)),
+                ('received_count', models.PositiveIntegerField(default=0)),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='monthly_statement_set', to='payments.Currency')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_statement_set', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-month', 'currency'),
+                'unique_together': {('user', 'currency', 'month')},
+            },
+        ),
+    ]
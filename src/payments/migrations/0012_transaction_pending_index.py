@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(status='PENDING'), fields=['id'], name='payments_transaction_pending'),
+        ),
+    ]
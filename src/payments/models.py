@@ -1,9 +1,12 @@
 from django.db import models
+from django.db.models import Sum
+from django.utils import timezone
 
 from accounts.models import User
-from core.enums import TransactionStatus
+from core.enums import TransactionStatus, LedgerEntryType
 from core.mixins import UpdateMixin
 from core.models import CreatedUpdatedModel
+from .managers import WalletQuerySet
 
 
 class Currency(CreatedUpdatedModel):
@@ -23,17 +26,48 @@ class Wallet(CreatedUpdatedModel, UpdateMixin):
     currency = models.ForeignKey(Currency, on_delete=models.PROTECT, related_name='wallet_set')
     name = models.CharField(max_length=64)
     balance = models.FloatField(default=0)
+    stripes = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Number of sub-balances incoming credits are spread over. Zero disables striping.')
+
+    objects = WalletQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    @property
+    def total_balance(self):
+        """ Balance including credits that are not consolidated from stripes yet. """
+        if not self.stripes:
+            return self.balance
+
+        if 'striped_balance' in self.__dict__:
+            striped_balance = self.striped_balance
+        else:
+            striped_balance = self.stripe_set.aggregate(balance=Sum('balance'))['balance']
+        return self.balance + (striped_balance or 0)
+
     class Meta:
         unique_together = ('user', 'currency')
 
 
+class WalletStripe(models.Model):
+    """ Sub-balance of a striped wallet. Credits are spread over stripes so that they don't
+    serialize on a single wallet row, debits and consolidation fold them back into the wallet. """
+
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='stripe_set')
+    index = models.PositiveSmallIntegerField()
+    balance = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('wallet', 'index')
+
+
 class Transaction(CreatedUpdatedModel):
-    from_user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='from_transaction_set')
-    to_user = models.ForeignKey(User, on_delete=models.PROTECT, related_name='to_transaction_set')
+    from_user = models.ForeignKey(
+        User, on_delete=models.PROTECT, related_name='from_transaction_set', db_index=False)
+    to_user = models.ForeignKey(
+        User, on_delete=models.PROTECT, related_name='to_transaction_set', db_index=False)
     amount = models.FloatField(default=0)
     currency = models.ForeignKey(Currency, on_delete=models.PROTECT, related_name='transaction_set')
     status = models.CharField(max_length=15, choices=TransactionStatus)
@@ -41,9 +75,137 @@ class Transaction(CreatedUpdatedModel):
 
     class Meta:
         ordering = ('-id',)
+        indexes = [
+            # serve keyset pagination of history, also cover lookups by user alone
+            models.Index(fields=['from_user', 'id']),
+            models.Index(fields=['to_user', 'id']),
+            # settlement workers only scan the pending ones
+            models.Index(
+                fields=['id'], name='payments_transaction_pending',
+                condition=models.Q(status=TransactionStatus.PENDING.value),
+            ),
+        ]
 
 
 class ExchangeRate(CreatedUpdatedModel):
     from_currency = models.ForeignKey(Currency, on_delete=models.PROTECT, related_name='from_currency_rate_set')
     to_currency = models.ForeignKey(Currency, on_delete=models.PROTECT, related_name='to_currency_rate_set')
     amount = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('from_currency', 'to_currency')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_amount = instance.__dict__.get('amount')
+        return instance
+
+    @property
+    def amount_changed(self):
+        return self.amount != getattr(self, 'loaded_amount', None)
+
+
+class ExchangeRateHistory(models.Model):
+    """ Append-only time series of exchange rates, a row is added whenever a rate changes. """
+
+    # both columns are covered by the composite index below
+    from_currency = models.ForeignKey(Currency, on_delete=models.PROTECT, related_name='+', db_index=False)
+    to_currency = models.ForeignKey(Currency, on_delete=models.PROTECT, related_name='+', db_index=False)
+    amount = models.FloatField()
+    effective_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = 'Exchange rate history'
+        indexes = [
+            models.Index(fields=['from_currency', 'to_currency', 'effective_at']),
+        ]
+
+
+class Exchange(CreatedUpdatedModel):
+    from_wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name='from_exchange_set')
+    to_wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name='to_exchange_set')
+    from_amount = models.FloatField()
+    to_amount = models.FloatField()
+    rate = models.FloatField()
+
+    class Meta:
+        ordering = ('-id',)
+
+
+class LedgerEntry(models.Model):
+    """ Append-only record of every balance movement. A transaction or an exchange produces
+    one debit (negative amount) and one credit (positive amount) entry, so `Wallet.balance`
+    is a projection that can always be rebuilt from the ledger. """
+
+    wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name='ledger_entry_set')
+    type = models.CharField(max_length=15, choices=LedgerEntryType)
+    amount = models.FloatField()
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.PROTECT, related_name='ledger_entry_set', null=True, blank=True)
+    exchange = models.ForeignKey(
+        Exchange, on_delete=models.PROTECT, related_name='ledger_entry_set', null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Ledger entries are append-only.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Ledger entries are append-only.')
+
+    class Meta:
+        verbose_name_plural = 'Ledger entries'
+        ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['wallet', 'id']),
+        ]
+
+
+class BalanceCheckpoint(models.Model):
+    """ Wallet balance derived from the ledger up to and including `last_entry_id`. """
+
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='checkpoint_set')
+    last_entry_id = models.IntegerField(default=0)
+    balance = models.FloatField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['wallet', 'id']),
+        ]
+
+
+class MonthlyStatement(models.Model):
+    """ Rollup of money a user sent and received in a currency during a month, including exchanges
+    between own wallets. Maintained in the same unit of work as the transfers it sums up. """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_statement_set')
+    currency = models.ForeignKey(Currency, on_delete=models.PROTECT, related_name='monthly_statement_set')
+    month = models.DateField(help_text='First day of the month.')
+    sent_amount = models.FloatField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    received_amount = models.FloatField(default=0)
+    received_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('-month', 'currency')
+        unique_together = ('user', 'currency', 'month')
+
+
+class IdempotencyKey(models.Model):
+    """ Response of a money-moving request stored under the `Idempotency-Key` header the client sent,
+    replayed when the request is retried. Rows older than `IDEMPOTENCY_KEY_TTL` are purged. """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_key_set')
+    key = models.CharField(max_length=255)
+    path = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text='SHA-256 of the request body.')
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from .crossrates import RateMatrix
+from .models import Currency, ExchangeRate
+from core.versions import get_version, bump_versions
+
+VERSION_KEY = 'payments:exchange-rates:version'
+CURRENCIES_VERSION_KEY = 'payments:currencies:version'
+VERSION_CHECK_INTERVAL = 1
+
+
+class RateTable:
+    """ Per-process table of exchange rates keyed by currency code pair. It is loaded once and reloaded
+    only when the version in the database changes, the version itself is checked at most once per interval.
+    Pairs without a stored rate are served from the cross-rate matrix. """
+
+    def __init__(self, check_interval=VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.version = None
+        self.checked_at = None
+        self.matrix = None
+        self.codes = {}
+        self.lock = threading.Lock()
+
+    def load(self, version):
+        codes = dict(Currency.objects.values_list('id', 'code'))
+        rates = {
+            (from_code, to_code): amount
+            for from_code, to_code, amount in ExchangeRate.objects.values_list(
+                'from_currency__code', 'to_currency__code', 'amount')
+        }
+
+        changed = self.get_changed_pairs(codes, rates)
+        if changed is not None and len(changed) == 1 and changed[0] in rates:
+            self.matrix.update(*changed[0], rates[changed[0]])
+        elif changed != []:
+            self.matrix = RateMatrix(sorted(codes.values()), rates)
+
+        self.codes = codes
+        self.version = version
+
+    def get_changed_pairs(self, codes, rates):
+        """ Return pairs whose stored rate differs from the loaded ones, None if currencies changed. """
+        if self.matrix is None or codes != self.codes:
+            return None
+
+        pairs = rates.keys() | self.matrix.rates.keys()
+        return [pair for pair in pairs if rates.get(pair) != self.matrix.rates.get(pair)]
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.check_interval:
+            return
+
+        with self.lock:
+            version = get_version(VERSION_KEY).value
+            if version != self.version:
+                self.load(version)
+            self.checked_at = now
+
+    def invalidate(self):
+        self.checked_at = None
+
+    def get(self, from_code, to_code):
+        self.refresh()
+        return self.matrix.get(from_code, to_code)
+
+    def get_by_currency_ids(self, from_currency_id, to_currency_id):
+        self.refresh()
+        return self.matrix.get(self.codes.get(from_currency_id), self.codes.get(to_currency_id))
+
+
+rate_table = RateTable()
+
+
+def get_rate(from_currency_id, to_currency_id):
+    """ Return exchange rate between currencies or None if there is no rate available. """
+    return rate_table.get_by_currency_ids(from_currency_id, to_currency_id)
+
+
+def convert(amount, from_currency_id, to_currency_id):
+    """ Value amount in another currency, returns None if there is no rate available. """
+    rate = get_rate(from_currency_id, to_currency_id)
+    return None if rate is None else amount * rate
+
+
+def invalidate():
+    """ Make all processes reload their rate tables. Must be called after rates are written in bulk. """
+    bump_versions(VERSION_KEY)
+    rate_table.invalidate()
+
+
+def invalidate_currencies():
+    bump_versions(CURRENCIES_VERSION_KEY)
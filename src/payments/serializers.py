@@ -1,8 +1,10 @@
 from rest_framework import serializers, generics
 
-from .models import Currency, Wallet, Transaction, ExchangeRate
+from . import ledger, rates, transfers
+from .models import Currency, Wallet, Transaction, ExchangeRate, Exchange, LedgerEntry, MonthlyStatement
 from accounts.models import User
 from accounts.serializers.users import UserPKField
+from core.serializers import CompiledListSerializer
 
 
 class CurrencySerializer(serializers.ModelSerializer):
@@ -26,14 +28,17 @@ class ExchangeRateSerializer(serializers.ModelSerializer):
             'amount',
             'updated_at',
         )
+        list_serializer_class = CompiledListSerializer
 
 
 class CurrencyPKField(serializers.SlugRelatedField):
+    serializer_class = CurrencySerializer
+
     def use_pk_only_optimization(self):
         return False
 
     def to_representation(self, value):
-        serializer = CurrencySerializer(value)
+        serializer = self.serializer_class(value)
         return serializer.data
 
 
@@ -44,7 +49,10 @@ class WalletSerializer(serializers.Serializer):
         slug_field='code',
     )
     name = serializers.CharField(max_length=64)
-    balance = serializers.FloatField(min_value=0)
+    balance = serializers.FloatField(source='total_balance', min_value=0)
+
+    class Meta:
+        list_serializer_class = CompiledListSerializer
 
     def validate_currency(self, value):
         user = self.context['request'].user
@@ -55,19 +63,28 @@ class WalletSerializer(serializers.Serializer):
 
     def update(self, instance, validated_data):
         validated_data.pop('currency', None)
+        balance = validated_data.pop('total_balance', None)
         instance.update(**validated_data)
+        if balance is not None:
+            transfers.set_balance(instance, balance)
         return instance
 
     def create(self, validated_data):
-        return Wallet.objects.create(**validated_data)
+        balance = validated_data.pop('total_balance', 0)
+        wallet = Wallet.objects.create(balance=balance, **validated_data)
+        if wallet.balance:
+            ledger.record_adjustment(wallet, wallet.balance)
+        return wallet
 
 
 class WalletPKField(serializers.PrimaryKeyRelatedField):
+    serializer_class = WalletSerializer
+
     def use_pk_only_optimization(self):
         return False
 
     def to_representation(self, value):
-        serializer = WalletSerializer(value)
+        serializer = self.serializer_class(value)
         return serializer.data
 
 
@@ -83,6 +100,9 @@ class TransactionSerializer(serializers.Serializer):
     )
     paid_at = serializers.ReadOnlyField()
 
+    class Meta:
+        list_serializer_class = CompiledListSerializer
+
     def validate_to_user(self, value):
         user = self.context['request'].user
         if value.id == user.id:
@@ -94,7 +114,7 @@ class TransactionSerializer(serializers.Serializer):
         user = self.context['request'].user
         from_user_wallet = generics.get_object_or_404(Wallet, user=user, currency=attrs['currency'])
 
-        if from_user_wallet.balance < attrs['amount']:
+        if from_user_wallet.total_balance < attrs['amount']:
             raise serializers.ValidationError('You\'d have enough money to send.')
 
         to_user_wallet_qs = Wallet.objects.filter(user=attrs['to_user'], currency=attrs['currency'])
@@ -109,35 +129,99 @@ class TransactionSerializer(serializers.Serializer):
         return Transaction.objects.create(**validated_data)
 
 
+class BatchTransactionItemSerializer(serializers.Serializer):
+    to_user = serializers.IntegerField()
+    amount = serializers.FloatField(min_value=0)
+    currency = serializers.CharField(max_length=32)
+
+
+class BatchTransactionResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField(allow_null=True)
+    errors = serializers.ListField(child=serializers.CharField())
+
+
+class BatchTransactionSerializer(serializers.Serializer):
+    """ Plain fields are used for items on purpose: relations are resolved for the whole batch
+    at once by `transfers.perform_batch` instead of with queries per item. """
+
+    transactions = serializers.ListField(
+        child=BatchTransactionItemSerializer(),
+        min_length=1,
+        max_length=10000,
+        write_only=True,
+    )
+    results = BatchTransactionResultSerializer(many=True, read_only=True)
+
+
 class ExchangeCurrencySerializer(serializers.Serializer):
     id = serializers.ReadOnlyField()
-    from_wallet = WalletPKField(queryset=Wallet.objects.all())
-    to_wallet = WalletPKField(queryset=Wallet.objects.all())
+    from_wallet = WalletPKField(queryset=Wallet.objects.select_related('currency'))
+    to_wallet = WalletPKField(queryset=Wallet.objects.select_related('currency'))
     from_amount = serializers.FloatField()
+    to_amount = serializers.ReadOnlyField()
+    rate = serializers.ReadOnlyField()
 
     def validate_from_wallet(self, value):
         user = self.context['request'].user
-        if value.user != user:
+        if value.user_id != user.id:
             raise serializers.ValidationError('Source wallet doesn\'t belong to you.')
 
         return value
 
     def validate_to_wallet(self, value):
         user = self.context['request'].user
-        if value.user != user:
+        if value.user_id != user.id:
             raise serializers.ValidationError('Target wallet doesn\'t belong to you.')
 
         return value
 
     def validate(self, attrs):
-        if attrs['from_wallet'].balance < attrs['from_amount']:
+        if attrs['from_wallet'] == attrs['to_wallet']:
+            raise serializers.ValidationError('Source and target wallets must be different.')
+
+        if attrs['from_wallet'].total_balance < attrs['from_amount']:
             raise serializers.ValidationError('You don\'t have enough money to exchange.')
 
-        rate_qs = ExchangeRate.objects.filter(
-            from_currency=attrs['from_wallet'].currency,
-            to_currency=attrs['to_wallet'].currency,
-        )
-        if not rate_qs.exists():
+        rate = rates.get_rate(attrs['from_wallet'].currency_id, attrs['to_wallet'].currency_id)
+        if rate is None:
             raise serializers.ValidationError('There is no exchange rate available between those currencies.')
 
+        attrs['rate'] = rate
         return attrs
+
+    def create(self, validated_data):
+        return Exchange.objects.create(**validated_data)
+
+
+class LedgerEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LedgerEntry
+        fields = (
+            'id',
+            'type',
+            'amount',
+            'transaction',
+            'exchange',
+            'created_at',
+        )
+
+
+class MonthlyStatementSerializer(serializers.ModelSerializer):
+    currency = CurrencySerializer()
+    month = serializers.DateField(format='%Y-%m')
+
+    class Meta:
+        model = MonthlyStatement
+        fields = (
+            'currency',
+            'month',
+            'sent_amount',
+            'sent_count',
+            'received_amount',
+            'received_count',
+        )
+
+
+class MonthlyStatementFilterSerializer(serializers.Serializer):
+    currency = serializers.SlugRelatedField(queryset=Currency.objects.all(), slug_field='code', required=False)
+    month = serializers.DateField(input_formats=['%Y-%m'], required=False)
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import history, rates, snapshots
+from .models import Currency, ExchangeRate, Wallet
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_rates(sender, **kwargs):
+    transaction.on_commit(rates.invalidate)
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def invalidate_currencies(sender, **kwargs):
+    transaction.on_commit(rates.invalidate_currencies)
+
+
+@receiver(post_save, sender=ExchangeRate)
+def record_rate_history(sender, instance, created, **kwargs):
+    if created or instance.amount_changed:
+        history.record([instance])
+        instance.loaded_amount = instance.amount
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def invalidate_wallet_snapshot(sender, instance, **kwargs):
+    snapshots.invalidate([instance.user_id])
@@ -0,0 +1,34 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from core import versions
+
+VERSION_KEY = 'payments:wallets:{user_id}:version'
+SNAPSHOT_KEY = 'payments:wallets:{user_id}:{version}'
+SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def get_version(user_id):
+    """ Version of the user's wallets, it only grows. It's kept in the database, so every process sees a bump. """
+    return versions.get_version(VERSION_KEY.format(user_id=user_id)).value
+
+
+def get_etag(user_id, version):
+    return f'"wallets-{user_id}-{version}"'
+
+
+def get_snapshot(user_id, version):
+    return cache.get(SNAPSHOT_KEY.format(user_id=user_id, version=version))
+
+
+def set_snapshot(user_id, version, data):
+    cache.set(SNAPSHOT_KEY.format(user_id=user_id, version=version), data, timeout=SNAPSHOT_TIMEOUT)
+
+
+def invalidate(user_ids):
+    """ Bump wallet versions of the users once the current unit of work commits, with a single UPDATE.
+    Bumping inside it would hold locks on the version rows until the commit, which would serialize credits
+    to striped wallets again. Snapshots of old versions are never read again and expire on their own. """
+
+    keys = [VERSION_KEY.format(user_id=user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: versions.bump_versions(*keys))
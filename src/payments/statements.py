@@ -0,0 +1,134 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, Count, DateField, F, FloatField, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from .models import Exchange, MonthlyStatement, Transaction
+from core.enums import TransactionStatus
+
+FIELDS = ('sent_amount', 'sent_count', 'received_amount', 'received_count')
+
+UPDATE_CHUNK_SIZE = 500
+
+
+def get_month(moment):
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def add(totals, key, sent=None, received=None):
+    """ Add a single sent or received amount to `totals`, which map (user id, currency id, month)
+    to a list of values of `FIELDS`. """
+
+    values = totals.setdefault(key, [0, 0, 0, 0])
+    if sent is not None:
+        values[0] += sent
+        values[1] += 1
+    if received is not None:
+        values[2] += received
+        values[3] += 1
+
+
+def record(totals):
+    """ Add totals to the rollups with set-based updates. Must be called in the same unit of work
+    as the transfers the totals come from.
+
+    Missing rollups are inserted first, ignoring conflicts with concurrent inserts. Both the inserts
+    and the row locks taken after them follow the key order, so concurrent transfers touching the same users,
+    e.g. opposite transfers between two users, can't deadlock on the unique index or on the rows. """
+
+    if not totals:
+        return
+
+    keys = sorted(totals)
+    MonthlyStatement.objects.bulk_create([
+        MonthlyStatement(user_id=user_id, currency_id=currency_id, month=month)
+        for user_id, currency_id, month in keys
+    ], batch_size=UPDATE_CHUNK_SIZE, ignore_conflicts=True)
+
+    for offset in range(0, len(keys), UPDATE_CHUNK_SIZE):
+        chunk = keys[offset:offset + UPDATE_CHUNK_SIZE]
+        condition = reduce(or_, (
+            Q(user_id=user_id, currency_id=currency_id, month=month)
+            for user_id, currency_id, month in chunk
+        ))
+        statement_ids = {
+            (user_id, currency_id, month): statement_id
+            for statement_id, user_id, currency_id, month in MonthlyStatement.objects.select_for_update().filter(
+                condition,
+            ).order_by('user_id', 'currency_id', 'month').values_list('id', 'user_id', 'currency_id', 'month')
+        }
+
+        MonthlyStatement.objects.filter(id__in=[statement_ids[key] for key in chunk]).update(**{
+            field: Case(
+                *[When(id=statement_ids[key], then=F(field) + Value(totals[key][i])) for key in chunk],
+                output_field=IntegerField() if field.endswith('_count') else FloatField(),
+            )
+            for i, field in enumerate(FIELDS)
+        })
+
+
+def record_transactions(transactions):
+    totals = {}
+    for transaction in transactions:
+        month = get_month(transaction.paid_at)
+        add(totals, (transaction.from_user_id, transaction.currency_id, month), sent=transaction.amount)
+        add(totals, (transaction.to_user_id, transaction.currency_id, month), received=transaction.amount)
+    record(totals)
+
+
+def record_exchange(exchange):
+    totals = {}
+    month = get_month(exchange.created_at)
+    add(totals, (exchange.from_wallet.user_id, exchange.from_wallet.currency_id, month), sent=exchange.from_amount)
+    add(totals, (exchange.to_wallet.user_id, exchange.to_wallet.currency_id, month), received=exchange.to_amount)
+    record(totals)
+
+
+def _aggregate(queryset, user_field, currency_field, date_field, amount_field):
+    return queryset.annotate(
+        statement_month=TruncMonth(date_field, output_field=DateField()),
+    ).values_list(user_field, currency_field, 'statement_month').annotate(
+        amount=Sum(amount_field),
+        count=Count('id'),
+    ).order_by()
+
+
+@atomic
+def rebuild(first_user_id, last_user_id):
+    """ Recompute rollups of users with ids in the given inclusive range from transactions and exchanges.
+    Returns the number of rollups written. """
+
+    transactions = Transaction.objects.filter(status=TransactionStatus.SUCCESSFUL)
+    exchanges = Exchange.objects.all()
+    sources = (
+        (0, _aggregate(transactions.filter(from_user__gte=first_user_id, from_user__lte=last_user_id),
+                       'from_user_id', 'currency_id', 'paid_at', 'amount')),
+        (2, _aggregate(transactions.filter(to_user__gte=first_user_id, to_user__lte=last_user_id),
+                       'to_user_id', 'currency_id', 'paid_at', 'amount')),
+        (0, _aggregate(exchanges.filter(from_wallet__user__gte=first_user_id, from_wallet__user__lte=last_user_id),
+                       'from_wallet__user_id', 'from_wallet__currency_id', 'created_at', 'from_amount')),
+        (2, _aggregate(exchanges.filter(to_wallet__user__gte=first_user_id, to_wallet__user__lte=last_user_id),
+                       'to_wallet__user_id', 'to_wallet__currency_id', 'created_at', 'to_amount')),
+    )
+
+    totals = {}
+    for offset, rows in sources:
+        for user_id, currency_id, month, amount, count in rows:
+            values = totals.setdefault((user_id, currency_id, month), [0, 0, 0, 0])
+            values[offset] += amount
+            values[offset + 1] += count
+
+    MonthlyStatement.objects.filter(user__gte=first_user_id, user__lte=last_user_id).delete()
+    MonthlyStatement.objects.bulk_create([
+        MonthlyStatement(
+            user_id=user_id,
+            currency_id=currency_id,
+            month=month,
+            **dict(zip(FIELDS, values)),
+        )
+        for (user_id, currency_id, month), values in totals.items()
+    ], batch_size=1000)
+    return len(totals)
@@ -0,0 +1,61 @@
+import random
+
+from django.db.models import F
+from django.db.transaction import atomic
+
+from .models import Wallet, WalletStripe
+
+
+def credit(wallet, amount):
+    """ Add amount to a randomly picked stripe of the wallet. Only the stripe row gets locked,
+    so concurrent credits to the same wallet mostly land on different rows. """
+
+    index = random.randrange(wallet.stripes)
+    updated = WalletStripe.objects.filter(wallet_id=wallet.id, index=index).update(balance=F('balance') + amount)
+    if not updated:
+        # stripes were reconfigured concurrently, credit the wallet itself
+        Wallet.objects.filter(id=wallet.id).update(balance=F('balance') + amount)
+
+
+def sweep(wallet_id, clear=True):
+    """ Lock all stripes of the wallet and return the sum of their balances.
+    With `clear` the stripes are reset, so the caller must add the sum to the wallet balance. """
+
+    balances = list(
+        WalletStripe.objects.select_for_update().filter(wallet_id=wallet_id)
+        .order_by('index').values_list('balance', flat=True)
+    )
+    amount = sum(balances)
+    if clear and amount:
+        WalletStripe.objects.filter(wallet_id=wallet_id).update(balance=0)
+    return amount
+
+
+@atomic
+def consolidate(wallet_id):
+    """ Fold stripes of the wallet back into its balance. """
+
+    list(Wallet.objects.select_for_update().filter(id=wallet_id).values_list('id'))
+    amount = sweep(wallet_id)
+    if amount:
+        Wallet.objects.filter(id=wallet_id).update(balance=F('balance') + amount)
+    return amount
+
+
+@atomic
+def configure(wallet, count):
+    """ Spread wallet credits over `count` stripes, zero disables striping. Stripes are consolidated
+    first and created before the wallet switches to them, so reconfiguring never loses money. """
+
+    consolidate(wallet.id)
+    WalletStripe.objects.filter(wallet_id=wallet.id, index__gte=count).delete()
+
+    existing = set(WalletStripe.objects.filter(wallet_id=wallet.id).values_list('index', flat=True))
+    WalletStripe.objects.bulk_create([
+        WalletStripe(wallet_id=wallet.id, index=index)
+        for index in range(count)
+        if index not in existing
+    ])
+
+    Wallet.objects.filter(id=wallet.id).update(stripes=count)
+    wallet.refresh_from_db(fields=('balance', 'stripes'))
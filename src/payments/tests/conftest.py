@@ -0,0 +1,13 @@
+import pytest
+
+from payments.models import Currency
+
+
+@pytest.fixture
+def create_currencies():
+    """ Factory of `count` currencies with codes C00, C01, ... """
+
+    def create(count):
+        return [Currency.objects.create(name=f'Currency {i}', code=f'C{i:02d}') for i in range(count)]
+
+    return create
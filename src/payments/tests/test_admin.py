@@ -0,0 +1,61 @@
+import pytest
+
+from django.contrib import admin
+from django.test import RequestFactory
+
+from core.enums import LedgerEntryType
+from payments.models import LedgerEntry, Wallet
+
+
+@pytest.fixture
+def wallet(user, create_currencies):
+    currency, = create_currencies(1)
+    return Wallet.objects.create(user=user, currency=currency, name='USD', balance=100)
+
+
+@pytest.fixture
+def save_wallet(create_user):
+    """ Submit the admin change form of a wallet instance with the fields changed, as a superuser. """
+
+    superuser = create_user(is_staff=True, is_superuser=True)
+
+    def save(wallet, **changes):
+        model_admin = admin.site._registry[Wallet]
+        request = RequestFactory().post('/')
+        request.user = superuser
+        form_class = model_admin.get_form(request, wallet, change=True)
+        data = {'name': wallet.name, 'user': wallet.user_id, 'currency': wallet.currency_id,
+                'balance': wallet.balance, 'stripes': wallet.stripes}
+        form = form_class({**data, **changes}, instance=wallet)
+        assert form.is_valid(), form.errors
+        model_admin.save_model(request, form.save(commit=False), form, change=True)
+
+    return save
+
+
+@pytest.mark.django_db
+class TestWalletAdmin:
+    def test_concurrent_transfer_kept(self, wallet, save_wallet):
+        loaded = Wallet.objects.get(id=wallet.id)
+        Wallet.objects.filter(id=wallet.id).update(balance=70)
+
+        save_wallet(loaded, name='Dollars')
+
+        wallet.refresh_from_db()
+        assert (wallet.name, wallet.balance) == ('Dollars', 70)
+
+    def test_balance_adjusted_from_locked_balance(self, wallet, save_wallet):
+        loaded = Wallet.objects.get(id=wallet.id)
+        Wallet.objects.filter(id=wallet.id).update(balance=70)
+
+        save_wallet(loaded, balance=150)
+
+        wallet.refresh_from_db()
+        assert wallet.balance == 150
+        assert list(LedgerEntry.objects.values_list('type', 'amount')) == [(LedgerEntryType.ADJUSTMENT, 80)]
+
+    def test_stripes_configured(self, wallet, save_wallet):
+        save_wallet(Wallet.objects.get(id=wallet.id), stripes=4)
+
+        wallet = Wallet.objects.with_striped_balance().get(id=wallet.id)
+        assert (wallet.stripes, wallet.total_balance) == (4, 100)
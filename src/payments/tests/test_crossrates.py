@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+
+from payments.crossrates import RateMatrix
+
+
+class TestRateMatrix:
+    def test_stored_rate(self):
+        matrix = RateMatrix(['EUR', 'USD'], {('EUR', 'USD'): 1.1, ('USD', 'EUR'): 0.8})
+
+        assert matrix.get('EUR', 'USD') == 1.1
+        assert matrix.get('USD', 'EUR') == 0.8
+        assert matrix.get('USD', 'USD') == 1
+
+    def test_inverse_rate(self):
+        matrix = RateMatrix(['EUR', 'USD'], {('EUR', 'USD'): 2})
+
+        assert matrix.get('USD', 'EUR') == 0.5
+
+    def test_triangulated_rate(self):
+        matrix = RateMatrix(['EUR', 'GBP', 'USD'], {('EUR', 'USD'): 2, ('USD', 'GBP'): 0.5})
+
+        assert matrix.get('EUR', 'GBP') == 1
+        assert matrix.get('GBP', 'EUR') == 1
+
+    def test_best_path(self):
+        matrix = RateMatrix(['A', 'B', 'C', 'D'], {
+            ('A', 'B'): 2, ('B', 'D'): 2,
+            ('A', 'C'): 3, ('C', 'D'): 3,
+        })
+
+        assert matrix.get('A', 'D') == 9
+
+    def test_path_longer_than_max_hops(self):
+        matrix = RateMatrix(['A', 'B', 'C', 'D'], {('A', 'B'): 1, ('B', 'C'): 1, ('C', 'D'): 1}, max_hops=2)
+
+        assert matrix.get('A', 'C') == 1
+        assert matrix.get('A', 'D') is None
+
+    def test_unknown_currency(self):
+        matrix = RateMatrix(['EUR', 'USD'], {('EUR', 'USD'): 2})
+
+        assert matrix.get('EUR', 'PLN') is None
+
+    def test_incremental_update_matches_rebuild(self):
+        random.seed(0)
+        codes = [f'C{i}' for i in range(20)]
+        rates = {tuple(random.sample(codes, 2)): random.uniform(0.5, 2) for __ in range(30)}
+        matrix = RateMatrix(codes, rates)
+
+        for __ in range(50):
+            pair = tuple(random.sample(codes, 2))
+            rates[pair] = random.uniform(0.5, 3)
+            matrix.update(*pair, rates[pair])
+
+            assert np.allclose(matrix.matrix, RateMatrix(codes, rates).matrix)
@@ -0,0 +1,47 @@
+import datetime
+
+import pytest
+
+from django.utils import timezone
+
+from payments import history
+from payments.models import ExchangeRateHistory
+
+
+@pytest.fixture
+def series(create_currencies):
+    """ Rates of two pairs at days 0, 10 and 20 since a start, only the first pair has one at day 0. """
+
+    usd, eur, gbp = create_currencies(3)
+    start = timezone.now() - datetime.timedelta(days=30)
+    ExchangeRateHistory.objects.bulk_create([
+        ExchangeRateHistory(from_currency=usd, to_currency=eur, amount=amount,
+                            effective_at=start + datetime.timedelta(days=day))
+        for day, amount in ((0, 0.8), (10, 0.9), (20, 1.0))
+    ] + [
+        ExchangeRateHistory(from_currency=usd, to_currency=gbp, amount=amount,
+                            effective_at=start + datetime.timedelta(days=day))
+        for day, amount in ((10, 0.7), (20, 0.75))
+    ])
+    return start, (usd.id, eur.id), (usd.id, gbp.id)
+
+
+@pytest.mark.django_db
+class TestRatesAsOf:
+    def test_rates_as_of(self, series, django_assert_num_queries):
+        start, usd_eur, usd_gbp = series
+
+        def at(day):
+            return start + datetime.timedelta(days=day)
+
+        with django_assert_num_queries(2):
+            rates = history.get_rates_as_of([
+                (*usd_eur, at(5)), (*usd_eur, at(15)), (*usd_eur, at(25)),
+                (*usd_gbp, at(5)), (*usd_gbp, at(15)), (*usd_gbp, at(10)),
+            ])
+
+        assert rates == [0.8, 0.9, 1.0, None, 0.7, 0.7]
+
+    def test_no_points(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert history.get_rates_as_of([]) == []
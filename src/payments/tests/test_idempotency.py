@@ -0,0 +1,58 @@
+import pytest
+
+from rest_framework import status
+
+from core.tests import test_error_response
+from payments.models import Currency, Transaction, Wallet
+
+TRANSACTIONS_URL = '/api/v1/payments/transactions'
+
+
+@pytest.fixture
+def transfer_setup(create_user, create_client):
+    sender, recipient = create_user(), create_user()
+    usd = Currency.objects.create(name='Dollar', code='USD')
+    sender_wallet = Wallet.objects.create(user=sender, currency=usd, name='USD', balance=100)
+    Wallet.objects.create(user=recipient, currency=usd, name='USD')
+
+    return create_client(sender), recipient, sender_wallet
+
+
+@pytest.mark.django_db
+class TestIdempotencyKey:
+    def test_replay(self, transfer_setup):
+        client, recipient, sender_wallet = transfer_setup
+        data = {'to_user': recipient.id, 'amount': 10, 'currency': 'USD'}
+
+        first = client.post(TRANSACTIONS_URL, data, format='json', HTTP_IDEMPOTENCY_KEY='key')
+        second = client.post(TRANSACTIONS_URL, data, format='json', HTTP_IDEMPOTENCY_KEY='key')
+
+        assert first.status_code == second.status_code == status.HTTP_201_CREATED
+        assert first.content == second.content
+        assert second['Idempotent-Replayed'] == 'true'
+        assert Transaction.objects.count() == 1
+        sender_wallet.refresh_from_db()
+        assert sender_wallet.balance == 90
+
+    def test_key_reused_for_different_request(self, transfer_setup):
+        client, recipient, __ = transfer_setup
+
+        client.post(TRANSACTIONS_URL, {'to_user': recipient.id, 'amount': 10, 'currency': 'USD'},
+                    format='json', HTTP_IDEMPOTENCY_KEY='key')
+        response = client.post(TRANSACTIONS_URL, {'to_user': recipient.id, 'amount': 20, 'currency': 'USD'},
+                               format='json', HTTP_IDEMPOTENCY_KEY='key')
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.data == test_error_response('Idempotency key was already used for a different request.')
+        assert Transaction.objects.count() == 1
+
+    def test_failed_request_releases_key(self, transfer_setup):
+        client, recipient, sender_wallet = transfer_setup
+        data = {'to_user': recipient.id, 'amount': 1000, 'currency': 'USD'}
+
+        first = client.post(TRANSACTIONS_URL, data, format='json', HTTP_IDEMPOTENCY_KEY='key')
+        sender_wallet.update(balance=1000)
+        second = client.post(TRANSACTIONS_URL, data, format='json', HTTP_IDEMPOTENCY_KEY='key')
+
+        assert first.status_code == status.HTTP_400_BAD_REQUEST
+        assert second.status_code == status.HTTP_201_CREATED
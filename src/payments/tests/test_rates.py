@@ -0,0 +1,33 @@
+import pytest
+
+from core.versions import bump_versions
+from payments import rates
+from payments.models import ExchangeRate
+
+
+@pytest.fixture
+def rate(create_currencies):
+    from_currency, to_currency = create_currencies(2)
+    return ExchangeRate.objects.create(from_currency=from_currency, to_currency=to_currency, amount=0.9)
+
+
+@pytest.mark.django_db
+class TestRateTable:
+    def test_version_bumped_by_another_process(self, rate):
+        table = rates.RateTable(check_interval=0)
+        assert table.get('C00', 'C01') == 0.9
+
+        # written in bulk by another process, which only shares the database with this one
+        ExchangeRate.objects.filter(id=rate.id).update(amount=0.8)
+        bump_versions(rates.VERSION_KEY)
+
+        assert table.get('C00', 'C01') == 0.8
+        assert table.get('C01', 'C00') == 1.25
+
+    def test_version_checked_once_per_interval(self, rate, django_assert_num_queries):
+        table = rates.RateTable(check_interval=60)
+        table.get('C00', 'C01')
+        bump_versions(rates.VERSION_KEY)
+
+        with django_assert_num_queries(0):
+            assert table.get('C00', 'C01') == 0.9
@@ -0,0 +1,35 @@
+import pytest
+from django.utils import timezone
+
+from core.enums import TransactionStatus
+from payments import transfers
+from payments.models import Currency, Transaction, Wallet
+
+
+@pytest.mark.django_db
+class TestSettlePending:
+    def test_settle_in_batches(self, create_user):
+        alice, bob = create_user(), create_user()
+        usd = Currency.objects.create(name='Dollar', code='USD')
+        alice_wallet = Wallet.objects.create(user=alice, currency=usd, name='USD', balance=50)
+        bob_wallet = Wallet.objects.create(user=bob, currency=usd, name='USD')
+        transactions = [
+            Transaction.objects.create(from_user=alice, to_user=bob, currency=usd, amount=amount,
+                                       status=TransactionStatus.PENDING, paid_at=timezone.now())
+            for amount in (20, 40, 30)
+        ]
+
+        assert transfers.settle_pending(batch_size=2) == 2
+        assert transfers.settle_pending(batch_size=2) == 1
+        assert transfers.settle_pending(batch_size=2) == 0
+
+        statuses = dict(Transaction.objects.values_list('id', 'status'))
+        assert [statuses[transaction.id] for transaction in transactions] == [
+            TransactionStatus.SUCCESSFUL,
+            TransactionStatus.CANCELED,
+            TransactionStatus.SUCCESSFUL,
+        ]
+        alice_wallet.refresh_from_db()
+        bob_wallet.refresh_from_db()
+        assert alice_wallet.balance == 0
+        assert bob_wallet.balance == 50
@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from core.enums import TransactionStatus
+from payments import statements
+from payments.models import Currency, Exchange, MonthlyStatement, Transaction, Wallet
+
+COLUMNS = ('user_id', 'currency_id', 'month', 'sent_amount', 'sent_count', 'received_amount', 'received_count')
+
+
+def get_rollups():
+    return sorted(MonthlyStatement.objects.values_list(*COLUMNS))
+
+
+@pytest.mark.django_db
+class TestStatements:
+    def test_record_transactions(self, create_user):
+        alice, bob = create_user(), create_user()
+        usd = Currency.objects.create(name='Dollar', code='USD')
+        paid_at = timezone.make_aware(datetime.datetime(2020, 6, 15))
+        transactions = [
+            Transaction(from_user=alice, to_user=bob, currency=usd, amount=amount,
+                        status=TransactionStatus.SUCCESSFUL, paid_at=paid_at)
+            for amount in (10, 5)
+        ]
+
+        statements.record_transactions(transactions[:1])
+        statements.record_transactions(transactions[1:])
+
+        month = datetime.date(2020, 6, 1)
+        assert get_rollups() == sorted([
+            (alice.id, usd.id, month, 15, 2, 0, 0),
+            (bob.id, usd.id, month, 0, 0, 15, 2),
+        ])
+
+    def test_inserted_in_key_order(self, create_user):
+        alice, bob = create_user(), create_user()
+        usd = Currency.objects.create(name='Dollar', code='USD')
+
+        # sent by the user with the greater id, the sender's rollup comes first in the totals
+        statements.record_transactions([
+            Transaction(from_user=bob, to_user=alice, currency=usd, amount=1,
+                        status=TransactionStatus.SUCCESSFUL, paid_at=timezone.now()),
+        ])
+
+        assert list(MonthlyStatement.objects.order_by('id').values_list('user_id', flat=True)) == [alice.id, bob.id]
+
+    def test_rebuild_matches_incremental(self, create_user):
+        alice, bob = create_user(), create_user()
+        usd = Currency.objects.create(name='Dollar', code='USD')
+        eur = Currency.objects.create(name='Euro', code='EUR')
+        usd_wallet = Wallet.objects.create(user=alice, currency=usd, name='USD')
+        eur_wallet = Wallet.objects.create(user=alice, currency=eur, name='EUR')
+
+        transactions = []
+        for month in (1, 2, 3):
+            paid_at = timezone.make_aware(datetime.datetime(2020, month, 28, 23, 30))
+            transactions += [
+                Transaction.objects.create(from_user=alice, to_user=bob, currency=usd, amount=month,
+                                           status=TransactionStatus.SUCCESSFUL, paid_at=paid_at),
+                Transaction.objects.create(from_user=bob, to_user=alice, currency=eur, amount=month * 2,
+                                           status=TransactionStatus.SUCCESSFUL, paid_at=paid_at),
+            ]
+        exchange = Exchange.objects.create(from_wallet=usd_wallet, to_wallet=eur_wallet,
+                                           from_amount=10, to_amount=9, rate=0.9)
+
+        statements.record_transactions(transactions)
+        statements.record_exchange(exchange)
+        incremental = get_rollups()
+
+        MonthlyStatement.objects.all().delete()
+        statements.rebuild(alice.id, alice.id)
+        statements.rebuild(bob.id, bob.id)
+
+        assert get_rollups() == incremental
+        assert len(incremental) == 2 * 2 * 3 + 2
@@ -0,0 +1,120 @@
+import pytest
+
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.enums import LedgerEntryType, TransactionStatus
+from payments import stripes, transfers
+from payments.models import Exchange, LedgerEntry, Transaction, Wallet
+
+
+@pytest.fixture
+def wallets(create_user, create_currencies):
+    """ USD wallets of a sender and a recipient and a EUR wallet of the sender. """
+
+    sender, recipient = create_user(), create_user()
+    usd, eur = create_currencies(2)
+    return (
+        Wallet.objects.create(user=sender, currency=usd, name='USD', balance=100),
+        Wallet.objects.create(user=recipient, currency=usd, name='USD'),
+        Wallet.objects.create(user=sender, currency=eur, name='EUR'),
+    )
+
+
+def create_transaction(from_wallet, to_wallet, amount):
+    return Transaction.objects.create(
+        from_user_id=from_wallet.user_id,
+        to_user_id=to_wallet.user_id,
+        currency_id=from_wallet.currency_id,
+        amount=amount,
+        status=TransactionStatus.SUCCESSFUL,
+        paid_at=timezone.now(),
+    )
+
+
+def get_balances(*wallets):
+    balances = dict(Wallet.objects.filter(id__in=[wallet.id for wallet in wallets]).values_list('id', 'balance'))
+    return [balances[wallet.id] for wallet in wallets]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTransfers:
+    def test_lock_order(self, wallets):
+        sender_wallet, recipient_wallet, eur_wallet = wallets
+
+        with CaptureQueriesContext(connection) as queries:
+            locked, __ = transfers.lock_wallets(Q(id=eur_wallet.id) | Q(id=sender_wallet.id))
+
+        assert list(locked) == [sender_wallet.id, eur_wallet.id]
+        assert 'ORDER BY "payments_wallet"."id" ASC' in queries[0]['sql']
+
+    def test_transaction(self, wallets):
+        sender_wallet, recipient_wallet, __ = wallets
+        transaction = create_transaction(sender_wallet, recipient_wallet, 30)
+
+        result = transfers.perform_transaction(transaction)
+
+        assert get_balances(sender_wallet, recipient_wallet) == [70, 30]
+        assert result.wallets[sender_wallet.id].balance == 70
+        assert sorted(LedgerEntry.objects.values_list('wallet_id', 'type', 'amount')) == [
+            (sender_wallet.id, LedgerEntryType.TRANSACTION, -30),
+            (recipient_wallet.id, LedgerEntryType.TRANSACTION, 30),
+        ]
+
+    def test_insufficient_funds(self, wallets):
+        sender_wallet, recipient_wallet, __ = wallets
+        transaction = create_transaction(sender_wallet, recipient_wallet, 101)
+
+        with pytest.raises(ValidationError):
+            transfers.perform_transaction(transaction)
+
+        assert get_balances(sender_wallet, recipient_wallet) == [100, 0]
+        assert not LedgerEntry.objects.exists()
+
+    def test_missing_wallet(self, wallets):
+        sender_wallet, recipient_wallet, eur_wallet = wallets
+        transaction = create_transaction(eur_wallet, recipient_wallet, 0)
+
+        with pytest.raises(transfers.WalletNotFound):
+            transfers.perform_transaction(transaction)
+
+    def test_striped_recipient(self, wallets):
+        sender_wallet, recipient_wallet, __ = wallets
+        stripes.configure(recipient_wallet, 4)
+
+        transfers.perform_transaction(create_transaction(sender_wallet, recipient_wallet, 30))
+
+        assert get_balances(sender_wallet, recipient_wallet) == [70, 0]
+        assert Wallet.objects.with_striped_balance().get(id=recipient_wallet.id).total_balance == 30
+
+    def test_exchange(self, wallets):
+        usd_wallet, __, eur_wallet = wallets
+        exchange = Exchange.objects.create(from_wallet=usd_wallet, to_wallet=eur_wallet,
+                                           from_amount=40, to_amount=36, rate=0.9)
+
+        transfers.perform_exchange(exchange)
+
+        assert get_balances(usd_wallet, eur_wallet) == [60, 36]
+        assert (exchange.from_wallet.balance, exchange.to_wallet.balance) == (60, 36)
+        assert LedgerEntry.objects.filter(exchange=exchange, type=LedgerEntryType.EXCHANGE).count() == 2
+
+    def test_exchange_insufficient_funds(self, wallets):
+        usd_wallet, __, eur_wallet = wallets
+        exchange = Exchange.objects.create(from_wallet=usd_wallet, to_wallet=eur_wallet,
+                                           from_amount=200, to_amount=180, rate=0.9)
+
+        with pytest.raises(ValidationError):
+            transfers.perform_exchange(exchange)
+
+        assert get_balances(usd_wallet, eur_wallet) == [100, 0]
+
+    def test_set_balance(self, wallets):
+        sender_wallet = wallets[0]
+
+        transfers.set_balance(sender_wallet, 120)
+
+        assert get_balances(sender_wallet) == [120]
+        assert list(LedgerEntry.objects.values_list('type', 'amount')) == [(LedgerEntryType.ADJUSTMENT, 20)]
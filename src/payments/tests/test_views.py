@@ -0,0 +1,334 @@
+import csv
+import gc
+import io
+import weakref
+
+import msgpack
+import pytest
+
+from rest_framework import status
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory
+
+from core import serializers as core_serializers, throttling
+from core.enums import TransactionStatus
+from core.generators import fake
+from payments import transfers
+from payments.models import ExchangeRate, Transaction, Wallet
+from payments.serializers import ExchangeRateSerializer, TransactionSerializer, WalletSerializer
+
+BASE_URL = '/api/v1/payments/'
+WALLETS_URL = BASE_URL + 'wallets'
+TRANSACTIONS_URL = BASE_URL + 'transactions'
+TRANSACTIONS_BATCH_URL = TRANSACTIONS_URL + '/batch'
+EXCHANGE_RATES_URL = BASE_URL + 'exchange-rates'
+CURRENCIES_URL = BASE_URL + 'currencies'
+EXPORT_CSV_URL = TRANSACTIONS_URL + '/export/csv'
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+    """ Related users and currencies of listed objects are loaded with the list itself,
+    the number of queries doesn't depend on the number of rows. """
+
+    @pytest.mark.parametrize('count', [1, 10])
+    def test_transaction_list(self, create_user, create_client, create_currencies, django_assert_num_queries, count):
+        user = create_user()
+        currencies = create_currencies(2)
+        Transaction.objects.bulk_create([
+            Transaction(
+                from_user=user if i % 2 else create_user(),
+                to_user=create_user() if i % 2 else user,
+                currency=currencies[i % 2],
+                amount=1,
+                status=TransactionStatus.SUCCESSFUL,
+                paid_at=fake.date_time(tzinfo=fake.pytimezone()),
+            )
+            for i in range(count)
+        ])
+        client = create_client(user)
+
+        with django_assert_num_queries(2):
+            response = client.get(TRANSACTIONS_URL, {'limit': 10})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == count
+
+    @pytest.mark.parametrize('count', [1, 10])
+    def test_wallet_list(self, create_user, create_client, create_currencies, django_assert_num_queries, count):
+        user = create_user()
+        for i, currency in enumerate(create_currencies(count)):
+            Wallet.objects.create(user=user, currency=currency, name=currency.code, stripes=i % 2)
+        client = create_client(user)
+
+        # the version, created by the first read, and the list
+        with django_assert_num_queries(4):
+            response = client.get(WALLETS_URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == count
+
+    @pytest.mark.parametrize('count', [2, 5])
+    def test_exchange_rate_list(self, create_user, create_client, create_currencies, django_assert_num_queries, count):
+        currencies = create_currencies(count)
+        ExchangeRate.objects.bulk_create([
+            ExchangeRate(from_currency=from_currency, to_currency=to_currency, amount=1)
+            for from_currency in currencies
+            for to_currency in currencies
+            if from_currency != to_currency
+        ])
+        client = create_client(create_user())
+
+        # the version, created by the first read, and the list
+        with django_assert_num_queries(4):
+            response = client.get(EXCHANGE_RATES_URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == count * (count - 1)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletSnapshot:
+    def test_not_modified(self, create_user, create_client, create_currencies, django_assert_num_queries):
+        user = create_user()
+        Wallet.objects.create(user=user, currency=create_currencies(1)[0], name='Wallet')
+        client = create_client(user)
+        etag = client.get(WALLETS_URL)['ETag']
+
+        # only the version is read
+        with django_assert_num_queries(1):
+            response = client.get(WALLETS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+
+    def test_transfer_changes_version(self, create_user, create_client, create_currencies):
+        sender, recipient = create_user(), create_user()
+        currency = create_currencies(1)[0]
+        Wallet.objects.create(user=sender, currency=currency, name='Wallet', balance=10)
+        Wallet.objects.create(user=recipient, currency=currency, name='Wallet')
+        client = create_client(recipient)
+        etag = client.get(WALLETS_URL)['ETag']
+
+        create_client(sender).post(TRANSACTIONS_URL, {'to_user': recipient.id, 'amount': 4, 'currency': currency.code},
+                                   format='json')
+        response = client.get(WALLETS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert response.data[0]['balance'] == 4
+
+    def test_changed_by_another_process(self, create_user, create_client, create_currencies, other_process):
+        user = create_user()
+        wallet = Wallet.objects.create(user=user, currency=create_currencies(1)[0], name='Wallet')
+        client = create_client(user)
+        etag = client.get(WALLETS_URL)['ETag']
+
+        with other_process:
+            transfers.set_balance(wallet, 5)
+        response = client.get(WALLETS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert response.data[0]['balance'] == 5
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+    @pytest.mark.parametrize('url', [CURRENCIES_URL, EXCHANGE_RATES_URL])
+    def test_not_modified(self, create_user, create_client, create_currencies, django_assert_num_queries, url):
+        create_currencies(2)
+        client = create_client(create_user())
+        response = client.get(url)
+
+        # only the version is read
+        with django_assert_num_queries(1):
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified['ETag'] == response['ETag']
+
+    def test_currency_change(self, create_user, create_client, create_currencies):
+        currency = create_currencies(1)[0]
+        client = create_client(create_user())
+        response = client.get(CURRENCIES_URL)
+
+        currency.name = 'Renamed'
+        currency.save()
+        changed = client.get(CURRENCIES_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed['ETag'] != response['ETag']
+        assert changed.data[0]['name'] == 'Renamed'
+
+    def test_deleted_by_another_process(self, create_user, create_client, create_currencies, other_process):
+        currency = create_currencies(2)[1]
+        client = create_client(create_user())
+        response = client.get(CURRENCIES_URL)
+
+        # served by a process that never saw the previous version, the latest change was a deletion
+        with other_process:
+            currency.delete()
+            changed = client.get(CURRENCIES_URL, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed['Last-Modified'] != response['Last-Modified']
+        assert len(changed.data) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRenderedResponseCache:
+    def test_cached_bytes(self, create_user, create_client, create_currencies, django_assert_num_queries):
+        from_currency, to_currency = create_currencies(2)
+        rate = ExchangeRate.objects.create(from_currency=from_currency, to_currency=to_currency, amount=2)
+        client = create_client(create_user())
+        response = client.get(EXCHANGE_RATES_URL)
+
+        # only the version is read
+        with django_assert_num_queries(1):
+            cached = client.get(EXCHANGE_RATES_URL)
+
+        assert cached.status_code == status.HTTP_200_OK
+        assert cached.content == response.content
+        assert cached['Content-Type'] == response['Content-Type']
+
+        rate.amount = 3
+        rate.save()
+        changed = client.get(EXCHANGE_RATES_URL)
+
+        assert changed.json()[0]['amount'] == 3
+
+    def test_changed_by_another_process(self, create_user, create_client, create_currencies, other_process):
+        from_currency, to_currency = create_currencies(2)
+        rate = ExchangeRate.objects.create(from_currency=from_currency, to_currency=to_currency, amount=2)
+        client = create_client(create_user())
+        client.get(EXCHANGE_RATES_URL)
+
+        with other_process:
+            rate.amount = 3
+            rate.save()
+        changed = client.get(EXCHANGE_RATES_URL)
+
+        assert changed.json()[0]['amount'] == 3
+
+
+@pytest.mark.django_db
+class TestTransactionExport:
+    def test_csv_formulas_escaped(self, create_user, create_client, create_currencies):
+        sender, recipient = create_user(name='=HYPERLINK("http://example.com")'), create_user(name='-Bob')
+        Transaction.objects.create(
+            from_user=sender,
+            to_user=recipient,
+            currency=create_currencies(1)[0],
+            amount=-1,
+            status=TransactionStatus.SUCCESSFUL,
+            paid_at=fake.date_time(tzinfo=fake.pytimezone()),
+        )
+
+        response = create_client(sender).get(EXPORT_CSV_URL)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        assert rows[1][3] == '\'=HYPERLINK("http://example.com")'
+        assert rows[1][5] == "'-Bob"
+        assert rows[1][6] == '-1.0'
+
+
+@pytest.mark.django_db
+class TestMessagePack:
+    def test_round_trip(self, create_user, create_client, create_currencies):
+        sender, recipient = create_user(), create_user()
+        currency = create_currencies(1)[0]
+        Wallet.objects.create(user=sender, currency=currency, name='Wallet', balance=10)
+        Wallet.objects.create(user=recipient, currency=currency, name='Wallet')
+        client = create_client(sender)
+
+        response = client.post(
+            TRANSACTIONS_URL,
+            msgpack.packb({'to_user': recipient.id, 'amount': 4, 'currency': currency.code}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response['Content-Type'] == 'application/msgpack'
+        data = msgpack.unpackb(response.content, raw=False)
+        assert data['amount'] == 4
+        assert data['to_user']['id'] == recipient.id
+
+
+@pytest.mark.django_db
+class TestCompiledListSerializer:
+    def test_same_representation(self, create_user, create_currencies):
+        sender, recipient = create_user(), create_user()
+        from_currency, to_currency = create_currencies(2)
+        Wallet.objects.create(user=sender, currency=from_currency, name='Wallet', balance=10.5)
+        Wallet.objects.create(user=sender, currency=to_currency, name='Striped', stripes=2)
+        Transaction.objects.create(
+            from_user=sender,
+            to_user=recipient,
+            currency=from_currency,
+            amount=2,
+            status=TransactionStatus.SUCCESSFUL,
+            paid_at=fake.date_time(tzinfo=fake.pytimezone()),
+        )
+        ExchangeRate.objects.create(from_currency=from_currency, to_currency=to_currency, amount=0.5)
+
+        for serializer_class, queryset in (
+            (WalletSerializer, Wallet.objects.with_striped_balance()),
+            (TransactionSerializer, Transaction.objects.all()),
+            (ExchangeRateSerializer, ExchangeRate.objects.all()),
+        ):
+            expected = ListSerializer(queryset, child=serializer_class()).data
+            assert serializer_class(queryset, many=True).data == expected
+
+    def test_request_not_retained(self, create_currencies, monkeypatch):
+        monkeypatch.setattr(core_serializers, 'compiled_serializers', {})
+        from_currency, to_currency = create_currencies(2)
+        ExchangeRate.objects.create(from_currency=from_currency, to_currency=to_currency, amount=0.5)
+        request = APIRequestFactory().get(EXCHANGE_RATES_URL)
+        reference = weakref.ref(request)
+
+        # `updated_at` is represented by the field itself, which is bound to its parent
+        ExchangeRateSerializer(ExchangeRate.objects.all(), many=True, context={'request': request}).data
+        del request
+        gc.collect()
+
+        assert reference() is None
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    def test_user_limit(self, create_user, create_client, monkeypatch):
+        monkeypatch.setattr(throttling.ScopedRateThrottle, 'THROTTLE_RATES', {'transactions': '2/minute'})
+        client, other_client = create_client(create_user()), create_client(create_user())
+
+        # the limit is checked before the data is validated
+        responses = [client.post(TRANSACTIONS_URL, {}) for __ in range(3)]
+
+        assert [response.status_code for response in responses] == [
+            status.HTTP_400_BAD_REQUEST,
+            status.HTTP_400_BAD_REQUEST,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        ]
+        assert 0 < int(responses[-1]['Retry-After']) <= 30
+        assert other_client.post(TRANSACTIONS_URL, {}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_history_not_limited(self, create_user, create_client, monkeypatch):
+        monkeypatch.setattr(throttling.ScopedRateThrottle, 'THROTTLE_RATES', {'transactions': '1/minute'})
+        client = create_client(create_user())
+        client.post(TRANSACTIONS_URL, {})
+
+        responses = [client.get(TRANSACTIONS_URL) for __ in range(3)]
+
+        assert [response.status_code for response in responses] == [status.HTTP_200_OK] * 3
+
+    def test_batch_limit(self, create_user, create_client, monkeypatch):
+        monkeypatch.setattr(throttling.ScopedRateThrottle, 'THROTTLE_RATES', {'transaction-batches': '1/minute'})
+        client = create_client(create_user())
+
+        responses = [client.post(TRANSACTIONS_BATCH_URL, {}) for __ in range(2)]
+
+        assert [response.status_code for response in responses] == [
+            status.HTTP_400_BAD_REQUEST,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        ]
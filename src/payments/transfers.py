@@ -0,0 +1,326 @@
+import logging
+import time
+
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.transaction import atomic
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import ledger, snapshots, statements, stripes
+from .models import Wallet, Currency, Transaction
+from accounts.models import User
+from core.enums import LedgerEntryType, TransactionStatus
+from core.utils import bulk_create_with_pk
+
+logger = logging.getLogger(__name__)
+
+UPDATE_CHUNK_SIZE = 500
+
+
+class WalletNotFound(serializers.ValidationError):
+    pass
+
+
+class Transfer:
+    """ Outcome of a single balance movement: wallets with their new balances
+    and the time spent waiting for the row locks. """
+
+    def __init__(self, wallets, lock_wait):
+        self.wallets = wallets
+        self.lock_wait = lock_wait
+
+    def __repr__(self):
+        return f'<Transfer wallets={sorted(self.wallets)} lock_wait={self.lock_wait:.6f}s>'
+
+
+def lock_wallets(condition):
+    """ Lock wallets matching given condition with `SELECT ... FOR UPDATE` in ascending id order.
+    Every transfer acquires its locks in the same global order, so concurrent transfers touching
+    the same wallets queue up instead of deadlocking. Must be called inside a transaction. """
+
+    started = time.perf_counter()
+    wallets = list(Wallet.objects.select_for_update().filter(condition).order_by('id'))
+    return {wallet.id: wallet for wallet in wallets}, time.perf_counter() - started
+
+
+def apply_deltas(wallets, locked, deltas, error_message):
+    """ Apply signed balance deltas to wallets. Locked wallets are changed with a single set-based UPDATE,
+    the arithmetic is done by the database and the overdraft check against locked rows.
+
+    Striped wallets that are only credited are not locked, the credit goes to one of their stripes.
+    Striped wallets that can't cover a debit from their own balance get their stripes swept first.
+    Stripe rows are always touched after wallet rows and in ascending wallet id order. """
+
+    wallet_deltas = {}
+    for wallet_id in sorted(deltas):
+        wallet = wallets[wallet_id]
+        delta = deltas[wallet_id]
+
+        if wallet_id not in locked:
+            stripes.credit(wallet, delta)
+            continue
+
+        swept = 0
+        if delta < 0 and wallet.balance + delta < 0 and wallet.stripes:
+            swept = stripes.sweep(wallet_id)
+            wallet.balance += swept
+
+        if delta < 0 and wallet.balance + delta < 0:
+            raise serializers.ValidationError(error_message)
+
+        wallet.balance += delta
+        wallet_deltas[wallet_id] = swept + delta
+
+    snapshots.invalidate({wallets[wallet_id].user_id for wallet_id in deltas})
+
+    wallet_deltas = list(wallet_deltas.items())
+    for offset in range(0, len(wallet_deltas), UPDATE_CHUNK_SIZE):
+        chunk = wallet_deltas[offset:offset + UPDATE_CHUNK_SIZE]
+        Wallet.objects.filter(id__in=[wallet_id for wallet_id, delta in chunk]).update(balance=Case(
+            *[When(id=wallet_id, then=F('balance') + Value(delta)) for wallet_id, delta in chunk],
+            output_field=FloatField(),
+        ))
+
+
+def transfer(debit_condition, credit_condition, get_deltas, error_message, **entry_kwargs):
+    """ Lock wallets, compute deltas from them, apply it and record it in the ledger in one unit of work.
+    Joins the outer transaction if there is one, without creating a savepoint.
+
+    Only non-striped wallets matching `credit_condition` are locked. Striped ones are fetched without
+    a lock when `get_deltas` can't find a wallet among the locked ones. """
+
+    with atomic(savepoint=False):
+        locked, lock_wait = lock_wallets(debit_condition | (credit_condition & Q(stripes=0)))
+        wallets = dict(locked)
+        try:
+            deltas = get_deltas(wallets)
+        except WalletNotFound:
+            wallets.update({
+                wallet.id: wallet
+                for wallet in Wallet.objects.filter(credit_condition, stripes__gt=0).exclude(id__in=locked)
+            })
+            deltas = get_deltas(wallets)
+
+        apply_deltas(wallets, locked, deltas, error_message)
+        ledger.record_entries(deltas, **entry_kwargs)
+
+    logger.info('Transfer between wallets %s waited %.6fs for locks.', sorted(deltas), lock_wait)
+    return Transfer(wallets, lock_wait)
+
+
+def perform_transaction(transaction):
+    """ Move transaction amount from sender's to recipient's wallet in transaction currency
+    and add it to monthly statements of both users. """
+
+    def get_deltas(wallets):
+        wallets_by_user = {wallet.user_id: wallet for wallet in wallets.values()}
+        from_wallet = wallets_by_user.get(transaction.from_user_id)
+        to_wallet = wallets_by_user.get(transaction.to_user_id)
+        if from_wallet is None or to_wallet is None:
+            raise WalletNotFound('Wallet in given currency doesn\'t exist.')
+
+        return {
+            from_wallet.id: -transaction.amount,
+            to_wallet.id: transaction.amount,
+        }
+
+    with atomic(savepoint=False):
+        result = transfer(
+            Q(currency_id=transaction.currency_id, user_id=transaction.from_user_id),
+            Q(currency_id=transaction.currency_id, user_id=transaction.to_user_id),
+            get_deltas,
+            'You don\'t have enough money to send.',
+            type=LedgerEntryType.TRANSACTION,
+            transaction=transaction,
+        )
+        statements.record_transactions([transaction])
+    return result
+
+
+def perform_exchange(exchange):
+    """ Move exchange amounts between two wallets of the same user and add them to the user's monthly statements.
+    Wallet instances of the exchange are refreshed with the new balances. """
+
+    from_wallet = exchange.from_wallet
+    to_wallet = exchange.to_wallet
+
+    def get_deltas(wallets):
+        if from_wallet.id not in wallets or to_wallet.id not in wallets:
+            raise WalletNotFound('Wallet doesn\'t exist.')
+
+        return {
+            from_wallet.id: -exchange.from_amount,
+            to_wallet.id: exchange.to_amount,
+        }
+
+    with atomic(savepoint=False):
+        result = transfer(
+            Q(id=from_wallet.id),
+            Q(id=to_wallet.id),
+            get_deltas,
+            'You don\'t have enough money to exchange.',
+            type=LedgerEntryType.EXCHANGE,
+            exchange=exchange,
+        )
+        statements.record_exchange(exchange)
+    from_wallet.balance = result.wallets[from_wallet.id].balance
+    to_wallet.balance = result.wallets[to_wallet.id].balance
+    return result
+
+
+def perform_batch(user, items):
+    """ Send money from user to many recipients in a single unit of work.
+
+    Items are validated in bulk with a constant number of queries, then checked in order against
+    the locked sender balances. Valid items are inserted with `bulk_create` and their deltas are
+    aggregated per wallet and applied with set-based updates, invalid ones are rejected.
+    Returns a result with the created transaction id or the errors for each item. """
+
+    results = [{'id': None, 'errors': []} for __ in items]
+
+    recipient_ids = set(User.objects.filter(id__in={item['to_user'] for item in items}).values_list('id', flat=True))
+    currency_ids = dict(Currency.objects.filter(code__in={item['currency'] for item in items}).values_list('code', 'id'))
+    wallets = {
+        (wallet.user_id, wallet.currency_id): wallet
+        for wallet in Wallet.objects.filter(user_id__in=recipient_ids | {user.id}, currency_id__in=currency_ids.values())
+    }
+
+    pending = []
+    for result, item in zip(results, items):
+        currency_id = currency_ids.get(item['currency'])
+        if item['to_user'] == user.id:
+            result['errors'].append('You cannot send money to yourself.')
+        elif item['to_user'] not in recipient_ids:
+            result['errors'].append('User doesn\'t exist.')
+        elif currency_id is None:
+            result['errors'].append('Currency doesn\'t exist.')
+        elif (user.id, currency_id) not in wallets:
+            result['errors'].append('You don\'t have a wallet in given currency.')
+        elif (item['to_user'], currency_id) not in wallets:
+            result['errors'].append('User that you want to send money doesn\'t have a wallet in given currency')
+        else:
+            pending.append((result, Transaction(
+                from_user_id=user.id,
+                to_user_id=item['to_user'],
+                currency_id=currency_id,
+                amount=item['amount'],
+            )))
+
+    if not pending:
+        return results
+
+    settled = settle_transactions([transaction for __, transaction in pending], wallets)
+    for (result, transaction), accepted in zip(pending, settled):
+        if accepted:
+            result['id'] = transaction.id
+        else:
+            result['errors'].append('You don\'t have enough money to send.')
+    return results
+
+
+def settle_transactions(transactions, wallets):
+    """ Settle transactions in a single unit of work. `wallets` maps (user id, currency id)
+    to the wallets of both sides of every transaction.
+
+    Transactions are checked in order against the locked sender balances. Accepted ones become successful,
+    new ones are inserted with `bulk_create` and existing ones updated with `bulk_update`. Their deltas are
+    aggregated per wallet and applied with set-based updates. Returns whether each transaction was accepted. """
+
+    sender_wallet_ids = {wallets[transaction.from_user_id, transaction.currency_id].id for transaction in transactions}
+    recipient_wallet_ids = {wallets[transaction.to_user_id, transaction.currency_id].id for transaction in transactions}
+    wallets_by_id = {wallet.id: wallet for wallet in wallets.values()}
+    lock_ids = sender_wallet_ids | {wallet_id for wallet_id in recipient_wallet_ids if not wallets_by_id[wallet_id].stripes}
+
+    with atomic(savepoint=False):
+        locked, lock_wait = lock_wallets(Q(id__in=lock_ids))
+        wallets_by_id.update(locked)
+        available = {
+            wallet_id: locked[wallet_id].balance + (stripes.sweep(wallet_id, clear=False) if locked[wallet_id].stripes else 0)
+            for wallet_id in sender_wallet_ids
+        }
+
+        paid_at = timezone.now()
+        deltas = {}
+        settled = []
+        accepted = []
+        for transaction in transactions:
+            from_wallet_id = wallets[transaction.from_user_id, transaction.currency_id].id
+            to_wallet_id = wallets[transaction.to_user_id, transaction.currency_id].id
+            settled.append(available[from_wallet_id] >= transaction.amount)
+            if not settled[-1]:
+                continue
+
+            available[from_wallet_id] -= transaction.amount
+            deltas[from_wallet_id] = deltas.get(from_wallet_id, 0) - transaction.amount
+            deltas[to_wallet_id] = deltas.get(to_wallet_id, 0) + transaction.amount
+            transaction.status = TransactionStatus.SUCCESSFUL
+            transaction.paid_at = paid_at
+            transaction.updated_at = paid_at
+            accepted.append(transaction)
+
+        if accepted:
+            new = [transaction for transaction in accepted if transaction.pk is None]
+            existing = [transaction for transaction in accepted if transaction.pk is not None]
+            bulk_create_with_pk(Transaction, new, batch_size=UPDATE_CHUNK_SIZE)
+            Transaction.objects.bulk_update(existing, ['status', 'paid_at', 'updated_at'], batch_size=UPDATE_CHUNK_SIZE)
+            apply_deltas(wallets_by_id, locked, deltas, 'You don\'t have enough money to send.')
+            ledger.record_transaction_entries(accepted, {key: wallet.id for key, wallet in wallets.items()})
+            statements.record_transactions(accepted)
+
+    logger.info('Batch of %d transfers waited %.6fs for locks.', len(accepted), lock_wait)
+    return settled
+
+
+def settle_pending(batch_size=UPDATE_CHUNK_SIZE):
+    """ Claim a batch of the oldest pending transactions and settle them. Rows claimed by other workers
+    are skipped with `SELECT ... FOR UPDATE SKIP LOCKED`, so workers settle disjoint batches in parallel.
+    Transactions that can't be settled are canceled. Returns the number of claimed transactions. """
+
+    with atomic():
+        transactions = list(
+            Transaction.objects.select_for_update(skip_locked=True)
+            .filter(status=TransactionStatus.PENDING).order_by('id')[:batch_size]
+        )
+        if not transactions:
+            return 0
+
+        wallets = {
+            (wallet.user_id, wallet.currency_id): wallet
+            for wallet in Wallet.objects.filter(
+                user_id__in={transaction.from_user_id for transaction in transactions} |
+                            {transaction.to_user_id for transaction in transactions},
+                currency_id__in={transaction.currency_id for transaction in transactions},
+            )
+        }
+        settleable = [
+            transaction for transaction in transactions
+            if (transaction.from_user_id, transaction.currency_id) in wallets
+            and (transaction.to_user_id, transaction.currency_id) in wallets
+        ]
+
+        settled = settle_transactions(settleable, wallets) if settleable else []
+        accepted = {transaction.id for transaction, ok in zip(settleable, settled) if ok}
+        canceled = [transaction.id for transaction in transactions if transaction.id not in accepted]
+        Transaction.objects.filter(id__in=canceled).update(status=TransactionStatus.CANCELED, updated_at=timezone.now())
+
+    logger.info('Settled %d and canceled %d pending transactions.', len(accepted), len(canceled))
+    return len(transactions)
+
+
+def set_balance(wallet, balance):
+    """ Overwrite wallet balance and record the difference as a ledger adjustment.
+    Stripes of the wallet are consolidated into the new balance. """
+
+    with atomic(savepoint=False):
+        wallets, lock_wait = lock_wallets(Q(id=wallet.id))
+        locked_wallet = wallets[wallet.id]
+        swept = stripes.sweep(wallet.id) if locked_wallet.stripes else 0
+        delta = balance - locked_wallet.balance - swept
+
+        Wallet.objects.filter(id=wallet.id).update(balance=balance)
+        snapshots.invalidate([wallet.user_id])
+        if delta:
+            ledger.record_adjustment(wallet, delta)
+
+    wallet.balance = balance
+    return Transfer(wallets, lock_wait)
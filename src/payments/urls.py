@@ -10,5 +10,9 @@ urlpatterns = [
     path('exchange-currency', views.ExchangeCurrencyAPIView.as_view()),
     path('wallets', views.WalletListAPIView.as_view()),
     path('wallets/<int:pk>', views.WalletAPIView.as_view()),
+    path('wallets/<int:pk>/entries', views.LedgerEntryListAPIView.as_view()),
     path('transactions', views.TransactionListAPIView.as_view()),
+    path('transactions/batch', views.TransactionBatchAPIView.as_view()),
+    path('transactions/export/<str:export_format>', views.TransactionExportAPIView.as_view()),
+    path('statements', views.MonthlyStatementListAPIView.as_view()),
 ]
@@ -1,38 +1,55 @@
 from drf_yasg.utils import swagger_auto_schema
 
+from django.conf import settings
 from django.db.models import Q
+from django.db.transaction import atomic
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import parse_etags, patch_cache_control
 from django.utils.decorators import method_decorator
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
-from .models import Transaction, Wallet, Currency, ExchangeRate
+from . import exports, rates, snapshots, transfers
+from .idempotency import idempotent
+from .models import Transaction, Wallet, Currency, ExchangeRate, LedgerEntry, MonthlyStatement
 from .serializers import (
     WalletSerializer,
     TransactionSerializer,
     CurrencySerializer,
     ExchangeRateSerializer,
     ExchangeCurrencySerializer,
+    LedgerEntrySerializer,
+    BatchTransactionSerializer,
+    MonthlyStatementSerializer,
+    MonthlyStatementFilterSerializer,
 )
+from core.conditional import ConditionalGetMixin, RenderedResponseCacheMixin
+from core.docs import header_fields, header_fields_idempotency
 from core.enums import TransactionStatus
+from core.pagination import KeysetPagination
+from core.throttling import ScopedRateThrottle
 
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
     operation_summary='[Currencies List] Retrieve a list of all the available currencies.',
 ))
-class CurrencyListAPIView(generics.ListAPIView):
+class CurrencyListAPIView(ConditionalGetMixin, RenderedResponseCacheMixin, generics.ListAPIView):
     serializer_class = CurrencySerializer
     queryset = Currency.objects.all()
     pagination_class = None
+    version_key = rates.CURRENCIES_VERSION_KEY
 
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
     operation_summary='[Exchange Rates List] Retrieve a list of all the current exchange rates.',
 ))
-class ExchangeRateListAPIView(generics.ListAPIView):
+class ExchangeRateListAPIView(ConditionalGetMixin, RenderedResponseCacheMixin, generics.ListAPIView):
     serializer_class = ExchangeRateSerializer
-    queryset = ExchangeRate.objects.all()
+    queryset = ExchangeRate.objects.select_related('from_currency', 'to_currency')
     pagination_class = None
+    version_key = rates.VERSION_KEY
 
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
@@ -47,7 +64,25 @@ class WalletListAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return Wallet.objects.filter(user=user)
+        return Wallet.objects.filter(user=user).select_related('currency').with_striped_balance()
+
+    def list(self, request, *args, **kwargs):
+        """ Serve the cached snapshot of the current wallet version, or nothing if the client has it already. """
+        user = self.request.user
+        version = snapshots.get_version(user.id)
+        etag = snapshots.get_etag(user.id, version)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = snapshots.get_snapshot(user.id, version)
+            if data is None:
+                data = super().list(request, *args, **kwargs).data
+                snapshots.set_snapshot(user.id, version, data)
+            response = Response(data)
+
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -68,7 +103,19 @@ class WalletAPIView(generics.RetrieveUpdateAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return Wallet.objects.filter(user=user)
+        return Wallet.objects.filter(user=user).select_related('currency')
+
+
+@method_decorator(name='get', decorator=swagger_auto_schema(
+    operation_summary='[Wallet Ledger] Retrieve a list of balance movements of your wallet.',
+))
+class LedgerEntryListAPIView(generics.ListAPIView):
+    serializer_class = LedgerEntrySerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        wallet = generics.get_object_or_404(Wallet, id=self.kwargs['pk'], user=user)
+        return LedgerEntry.objects.filter(wallet=wallet)
 
 
 @method_decorator(name='get', decorator=swagger_auto_schema(
@@ -76,19 +123,42 @@ class WalletAPIView(generics.RetrieveUpdateAPIView):
 ))
 @method_decorator(name='post', decorator=swagger_auto_schema(
     operation_summary='[Create Wallet] Create a new transaction.',
+    manual_parameters=header_fields + header_fields_idempotency,
 ))
 class TransactionListAPIView(generics.ListCreateAPIView):
     serializer_class = TransactionSerializer
+    pagination_class = KeysetPagination
+    throttle_scope = 'transactions'
+
+    def get_throttles(self):
+        # only creating transactions is limited, reading the history isn't
+        throttles = super().get_throttles()
+        if self.request.method != 'POST':
+            return [throttle for throttle in throttles if not isinstance(throttle, ScopedRateThrottle)]
+        return throttles
 
     def get_queryset(self):
         user = self.request.user
         return Transaction.objects.filter(
             Q(from_user=user) |
             Q(to_user=user)
-        )
+        ).select_related('from_user', 'to_user', 'currency')
 
+    def get_keyset_branches(self):
+        user = self.request.user
+        return Q(from_user=user), Q(to_user=user)
+
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+    @atomic
     def perform_create(self, serializer):
         user = self.request.user
+        if settings.PAYMENTS_ASYNC_SETTLEMENT:
+            serializer.save(from_user=user, status=TransactionStatus.PENDING, paid_at=timezone.now())
+            return
+
         transaction = serializer.save(
             from_user=user,
             status=TransactionStatus.SUCCESSFUL,
@@ -97,34 +167,73 @@ class TransactionListAPIView(generics.ListCreateAPIView):
         self.perform_transaction(transaction)
 
     def perform_transaction(self, transaction):
-        from_wallet = Wallet.objects.get(user=transaction.from_user, currency=transaction.currency)
-        to_wallet = Wallet.objects.get(user=transaction.to_user, currency=transaction.currency)
-        from_wallet.update(balance=from_wallet.balance - transaction.amount)
-        to_wallet.update(balance=to_wallet.balance + transaction.amount)
+        transfers.perform_transaction(transaction)
+
+
+@method_decorator(name='get', decorator=swagger_auto_schema(
+    operation_summary='[Export Transactions] Download your whole transaction history as NDJSON or CSV.',
+))
+class TransactionExportAPIView(generics.GenericAPIView):
+    serializer_class = TransactionSerializer
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        export_format = self.kwargs['export_format']
+        if export_format not in exports.RENDERERS:
+            raise NotFound('Export format is not supported.')
+
+        content, content_type = exports.export_history(request.user, export_format)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{export_format}"'
+        return response
+
+
+@method_decorator(name='post', decorator=swagger_auto_schema(
+    operation_summary='[Batch Transactions] Create many transactions at once, e.g. a payroll.',
+))
+class TransactionBatchAPIView(generics.GenericAPIView):
+    serializer_class = BatchTransactionSerializer
+    throttle_scope = 'transaction-batches'
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = transfers.perform_batch(request.user, serializer.validated_data['transactions'])
+        serializer = self.get_serializer({'results': results})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(name='get', decorator=swagger_auto_schema(
+    operation_summary='[Statements] Retrieve monthly totals of money you sent and received per currency.',
+    query_serializer=MonthlyStatementFilterSerializer,
+))
+class MonthlyStatementListAPIView(generics.ListAPIView):
+    serializer_class = MonthlyStatementSerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        filters = MonthlyStatementFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return MonthlyStatement.objects.filter(user=user, **filters.validated_data).select_related('currency')
 
 
 @method_decorator(name='post', decorator=swagger_auto_schema(
     operation_summary='[Exchange Currency] Exchange currency between your wallets.',
+    manual_parameters=header_fields + header_fields_idempotency,
 ))
 class ExchangeCurrencyAPIView(generics.GenericAPIView):
     serializer_class = ExchangeCurrencySerializer
+    throttle_scope = 'exchange-currency'
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        self.perform_exchange(data)
+        self.perform_exchange(serializer)
         return Response(serializer.data)
 
-    def perform_exchange(self, data):
-        from_wallet = data['from_wallet']
-        to_wallet = data['to_wallet']
-        from_amount = data['from_amount']
-        exchange_rate = generics.get_object_or_404(
-            ExchangeRate,
-            from_currency=from_wallet.currency,
-            to_currency=to_wallet.currency,
-        )
-        to_amount = from_amount * exchange_rate.amount
-        from_wallet.update(balance=from_wallet.balance - from_amount)
-        to_wallet.update(balance=to_wallet.balance + to_amount)
+    @atomic
+    def perform_exchange(self, serializer):
+        data = serializer.validated_data
+        exchange = serializer.save(to_amount=data['from_amount'] * data['rate'])
+        transfers.perform_exchange(exchange)